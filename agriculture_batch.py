@@ -0,0 +1,127 @@
+# Vectorized evaluation of the agriculture.py rule tables over whole batches.
+#
+# Each clause becomes a NumPy boolean mask over the batch, so the Python-level work
+# is per rule rather than per row. Rows come back in input order and match
+# build_agriculture_recommendation row for row.
+import numpy as np
+
+from agriculture import (
+    ALERT_RULES,
+    CROP_RULES,
+    DEFAULT_SOWING_WINDOW,
+    FERTILIZER_RULES,
+    IRRIGATION_RULES,
+    PEST_DISEASE_RULES,
+    POST_HARVEST_RULES,
+    SOWING_WINDOW_RULES,
+)
+
+_COMPARE = {
+    '<': np.less,
+    '<=': np.less_equal,
+    '>': np.greater,
+    '>=': np.greater_equal,
+    '==': np.equal,
+}
+
+_CROPS = list(CROP_RULES)
+_CROP_IDS = {crop: i for i, crop in enumerate(_CROPS)}
+
+
+def _mask(conditions, columns, n):
+    mask = np.ones(n, dtype=bool)
+    for clause in conditions:
+        x = columns[clause[0]]
+        if clause[1] == 'between':
+            mask &= (x >= clause[2]) & (x <= clause[3])
+        else:
+            mask &= _COMPARE[clause[1]](x, clause[2])
+    return mask
+
+
+def _first_match(rules, columns, n):
+    """Value of the first matching rule for each row, as a list."""
+    choice = np.zeros(n, dtype=np.intp)
+    # Assign in reverse so earlier rules overwrite later ones
+    for i in range(len(rules) - 1, -1, -1):
+        choice[_mask(rules[i][0], columns, n)] = i
+    values = np.empty(len(rules), dtype=object)
+    values[:] = [value for _, value in rules]
+    return values[choice].tolist()
+
+
+def _all_matches(rules, columns, n):
+    """List of every matching rule's value for each row."""
+    codes = np.zeros(n, dtype=np.int64)
+    for i, (conditions, _) in enumerate(rules):
+        codes |= _mask(conditions, columns, n).astype(np.int64) << i
+    values = [value for _, value in rules]
+    unique_codes, inverse = np.unique(codes, return_inverse=True)
+    combos = [[value for j, value in enumerate(values) if code >> j & 1] for code in unique_codes.tolist()]
+    # Copy so rows never share (and mutate) the same list
+    return [combos[i][:] for i in inverse.tolist()]
+
+
+def _for_crop(rules, crop):
+    return [(conditions, value) for crops, conditions, value in rules if crops is None or crop in crops]
+
+
+def build_agriculture_recommendations(crops, temperatures, humidities, rainfalls):
+    """Evaluate the crop rules for parallel sequences of inputs.
+
+    Raises ValueError if the sequences differ in length or hold non-numeric values.
+    """
+    t = np.asarray(temperatures, dtype=np.float64)
+    h = np.asarray(humidities, dtype=np.float64)
+    r = np.asarray(rainfalls, dtype=np.float64)
+    n = len(crops)
+    if t.shape != (n,) or h.shape != (n,) or r.shape != (n,):
+        raise ValueError('crop, temperature, humidity and rainfall must be arrays of the same length')
+    columns = { 't': t, 'h': h, 'r': r }
+
+    alerts = _all_matches(ALERT_RULES, columns, n)
+    irrigation = _first_match(IRRIGATION_RULES, columns, n)
+    fertilizer = _first_match(FERTILIZER_RULES, columns, n)
+    post_harvest = _first_match(POST_HARVEST_RULES, columns, n)
+
+    # Crop-dependent tables are evaluated once per distinct crop on that crop's rows
+    recommendation = [None] * n
+    sowing_window = [None] * n
+    pest_disease_risks = [None] * n
+    crop_ids = np.fromiter((_CROP_IDS.get(crop, -1) for crop in crops), dtype=np.intp, count=n)
+    for crop_id in np.unique(crop_ids).tolist():
+        rows = np.flatnonzero(crop_ids == crop_id)
+        crop = _CROPS[crop_id] if crop_id >= 0 else None
+        sub = { name: column[rows] for name, column in columns.items() }
+        m = len(rows)
+        rows = rows.tolist()
+
+        if crop is not None:
+            values = _first_match(CROP_RULES[crop], sub, m)
+        else:
+            # Fallback if crop not recognized
+            values = [
+                f'{crops[i]}: Analyze temperature ({ti}°C), humidity ({hi}%), and rainfall ({ri}mm) against crop-specific requirements before proceeding.'
+                for i, ti, hi, ri in zip(rows, sub['t'].tolist(), sub['h'].tolist(), sub['r'].tolist())
+            ]
+        sowing = _first_match(_for_crop(SOWING_WINDOW_RULES, crop) + [([], DEFAULT_SOWING_WINDOW)], sub, m)
+        pests = _all_matches(_for_crop(PEST_DISEASE_RULES, crop), sub, m)
+        for i, rec, sow, pest in zip(rows, values, sowing, pests):
+            recommendation[i] = rec
+            sowing_window[i] = sow
+            pest_disease_risks[i] = pest
+
+    return [
+        {
+            'crop': crop,
+            'recommendation': rec,
+            'alerts': alert,
+            'irrigation': irr,
+            'fertilizer': fert,
+            'sowingWindow': sow,
+            'pestDiseaseRisks': pest,
+            'postHarvest': post
+        }
+        for crop, rec, alert, irr, fert, sow, pest, post in zip(
+            crops, recommendation, alerts, irrigation, fertilizer, sowing_window, pest_disease_risks, post_harvest)
+    ]
@@ -1,29 +1,291 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for
+from flask import Flask, render_template, request, redirect, stream_with_context, url_for
 import requests
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 import var
 import os
+import upstream
+import breaker
+import jsonutil
+import compression
+import metrics
+import server_timing
+import payloads
+from cache import ByteLRU, TTLCache, SingleFlight
+from shared_cache import DEFAULT_SQLITE_PATH, SQLiteCache
+from cities import get_city_index, parse_city, place
+from prewarm import Prewarmer
+from agriculture import build_agriculture_recommendation, recommend_crops_from_averages
+from agriculture_batch import build_agriculture_recommendations
+from forecast_series import DEFAULT_HORIZON_HOURS, compact_forecast, parse_horizon
 
 app = Flask(__name__)
 
+# Current conditions change roughly every 10 minutes, forecast slots every 3 hours.
+# Stale entries are served for CACHE_STALE_TTL more seconds while one background refresh runs.
+CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 512))
+CACHE_STALE_TTL = int(os.environ.get('CACHE_STALE_TTL', 600))
+
+# CACHE_BACKEND=sqlite shares entries between all gunicorn workers on a host
+# (and across worker restarts) through a WAL-mode SQLite file.
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')
+CACHE_SQLITE_PATH = os.environ.get('CACHE_SQLITE_PATH', DEFAULT_SQLITE_PATH)
+
+def make_cache(name, maxsize, ttl, stale_ttl=0):
+    if CACHE_BACKEND == 'sqlite':
+        return SQLiteCache(CACHE_SQLITE_PATH, name, maxsize, ttl, stale_ttl)
+    return TTLCache(maxsize, ttl, stale_ttl)
+
+weather_cache = make_cache('weather', CACHE_MAX_ENTRIES, int(os.environ.get('WEATHER_CACHE_TTL', 600)), CACHE_STALE_TTL)
+forecast_cache = make_cache('forecast', CACHE_MAX_ENTRIES, int(os.environ.get('FORECAST_CACHE_TTL', 10800)), CACHE_STALE_TTL)
+
+# Concurrent misses for the same (endpoint, city) share a single upstream call.
+# Followers give up after UPSTREAM_WAIT_TIMEOUT seconds instead of queueing forever.
+UPSTREAM_WAIT_TIMEOUT = float(os.environ.get('UPSTREAM_WAIT_TIMEOUT', 15))
+upstream_calls = SingleFlight()
+
+# City input is resolved to coordinates, locally from the bulk city list when
+# possible, otherwise with one geocoding call memoized for GEOCODE_CACHE_TTL.
+GEOCODE_CACHE_TTL = int(os.environ.get('GEOCODE_CACHE_TTL', 30 * 24 * 3600))
+geocode_cache = make_cache('geocode', int(os.environ.get('GEOCODE_CACHE_MAX_ENTRIES', 4096)), GEOCODE_CACHE_TTL)
+# Failed lookups (errors, timeouts, open breaker) go straight to the q= fallback
+# for GEOCODE_FAILURE_TTL seconds instead of calling geocoding on every request
+GEOCODE_FAILURE_TTL = int(os.environ.get('GEOCODE_FAILURE_TTL', 60))
+geocode_failures = make_cache('geocode_failures', int(os.environ.get('GEOCODE_CACHE_MAX_ENTRIES', 4096)), GEOCODE_FAILURE_TTL)
+CITY_NOT_FOUND = '404: city not found'
+
+# Returned while an endpoint's circuit breaker is open and nothing was cached
+UPSTREAM_UNAVAILABLE = 'Weather service is temporarily unavailable. Please try again shortly.'
+
+BATCH_MAX_ROWS = int(os.environ.get('BATCH_MAX_ROWS', 100000))
+
+# Multi-city requests share one bounded pool so a large report cannot open an
+# unbounded number of upstream connections. Cities still pending at the deadline
+# are reported as such instead of holding up the whole batch.
+FANOUT_WORKERS = int(os.environ.get('FANOUT_WORKERS', 8))
+FANOUT_MAX_CITIES = int(os.environ.get('FANOUT_MAX_CITIES', 500))
+FANOUT_DEADLINE = float(os.environ.get('FANOUT_DEADLINE', 8))
+DEADLINE_EXCEEDED = 'Deadline exceeded before the forecast arrived.'
+fanout_pool = ThreadPoolExecutor(max_workers=FANOUT_WORKERS, thread_name_prefix='fanout')
+
+# /result sends the static <head> first and streams the weather-dependent body once
+# the weather arrives (RESULT_STREAM=0 sends the whole page at once). Rendered
+# bodies are cached by (city as typed, observation dt, condition): they only change
+# when OpenWeather publishes a new observation.
+RESULT_STREAM = os.environ.get('RESULT_STREAM', '1') != '0'
+RESULT_CACHE_BYTES = int(os.environ.get('RESULT_CACHE_BYTES', 16 * 1024 * 1024))
+result_pages = ByteLRU(RESULT_CACHE_BYTES)
+
+# Browsers may reuse a CORS preflight answer for this many seconds
+CORS_MAX_AGE = int(os.environ.get('CORS_MAX_AGE', 86400))
+
 # Add CORS headers to allow frontend (Amplify) to call backend API
 @app.after_request
 def after_request(response):
     response.headers.add('Access-Control-Allow-Origin', '*')
     response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization')
     response.headers.add('Access-Control-Allow-Methods', 'GET,POST,PUT,DELETE,OPTIONS')
+    if request.method == 'OPTIONS':
+        response.headers['Access-Control-Max-Age'] = str(CORS_MAX_AGE)
+    breakers = upstream.breaker_states()
+    if breakers:
+        response.headers['X-Upstream-Breakers'] = ', '.join(f'{name}={state}' for name, state in breakers.items())
+    return response
+
+@app.after_request
+def compress_response(response):
+    if response.status_code != 200 or response.direct_passthrough or 'Content-Encoding' in response.headers:
+        return response
+    if response.is_streamed:
+        if compression.compressible(response.mimetype):
+            response.vary.add('Accept-Encoding')
+            encoding = compression.negotiate(request.headers.get('Accept-Encoding'))
+            if encoding is not None:
+                response.response = compression.compress_stream(response.response, encoding)
+                response.headers['Content-Encoding'] = encoding
+        return response
+    body = response.get_data()
+    if not compression.should_compress(response.mimetype, len(body)):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = compression.negotiate(request.headers.get('Accept-Encoding'))
+    if encoding is None:
+        return response
+    response.set_data(compression.compress(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        # The bytes differ per encoding, so a strong validator no longer holds
+        response.set_etag(etag, weak=True)
+    return response
+
+def json_response(payload):
+    return app.response_class(jsonutil.dumps(payload), mimetype='application/json')
+
+def _variant_tag(variant):
+    return hashlib.blake2b(repr(variant).encode(), digest_size=6).hexdigest()
+
+def validators(results, variant, max_age=None):
+    """``(etag, max_age)`` for a body built from cached upstream ``results``, or None.
+
+    The weak ETag joins each entry's tag (upstream ``dt`` plus a fingerprint
+    taken when it was stored) with a hash of ``variant``, the request inputs
+    that shape the body. max_age allows reuse until the earliest entry is due
+    for a refetch (``max_age`` when there are no results). None when a result
+    has no tag, e.g. a failed fetch.
+    """
+    tags = [r.get('tag') for r in results]
+    if not all(tags):
+        return None
+    etag = '-'.join(tags + [_variant_tag(variant)])
+    if results:
+        max_age = min(r['expires_at'] for r in results) - time.time()
+    return etag, max(0, int(max_age))
+
+def cached_response(results, variant, build, max_age=None):
+    """Conditional JSON response for data built from cached upstream ``results`` (see validators).
+
+    A matching If-None-Match gets a 304 without calling ``build``.
+    """
+    v = validators(results, variant, max_age)
+    if v is None:
+        return json_response(build())
+    etag, max_age = v
+    if request.if_none_match.contains_weak(etag):
+        response = app.response_class(status=304)
+    else:
+        response = json_response(build())
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = f'public, max-age={max_age}'
     return response
 
+def _json_body():
+    try:
+        return jsonutil.loads(request.get_data(cache=False))
+    except ValueError:
+        return None
+
+def stamp_entry(result, ttl):
+    """Add the ETag part and refetch time used by cached_response to a result about to be cached."""
+    data = result.get('data')
+    dt = None
+    if isinstance(data, dict):
+        # Observation time for weather, first slot for a forecast
+        dt = data.get('dt') or ((data.get('list') or [{}])[0].get('dt'))
+    fingerprint = hashlib.blake2b(jsonutil.dumps(data), digest_size=6).hexdigest()
+    result['tag'] = f'{dt}.{fingerprint}' if dt else fingerprint
+    result['expires_at'] = time.time() + ttl
+    return result
+
+def _fetch_and_store(cache, key, fetch):
+    result = fetch()
+    # Only successful payloads are cached; errors are retried on the next request
+    if result.get('ok'):
+        cache.set(key, stamp_entry(result, cache.ttl))
+    return result
+
+def _refresh_entry(cache, key, fetch):
+    try:
+        upstream_calls.do(key, lambda: _fetch_and_store(cache, key, fetch))
+    finally:
+        cache.end_refresh(key)
+
+def _cached_fetch(cache, key, fetch):
+    value, state = cache.get(key)
+    if state == 'fresh':
+        return value
+    if state == 'stale':
+        if cache.begin_refresh(key):
+            threading.Thread(target=_refresh_entry, args=(cache, key, fetch), daemon=True).start()
+        return value
+    try:
+        with server_timing.span('upstream'):
+            result = upstream_calls.do(key, lambda: _fetch_and_store(cache, key, fetch), timeout=UPSTREAM_WAIT_TIMEOUT)
+    except TimeoutError:
+        return { 'ok': False, 'error': 'Request timed out. Please try again.' }
+    if result.get('unavailable'):
+        # Circuit open: the last good payload, however old, beats an error
+        last_good = cache.last_good(key)
+        if last_good is not None:
+            return dict(last_good, stale=True)
+    return result
+
+def resolve_city(api_key, city):
+    """``(place, error)`` for free-text city input.
+
+    place is a dict with lat/lon, or None when neither the index nor geocoding
+    could answer (the caller then falls back to a q= lookup).
+    """
+    query = parse_city(city)
+    found, ambiguous = get_city_index().lookup(*query)
+    if found is not None and not ambiguous:
+        return found, None
+    key = ('geocode',) + query
+    if GEOCODE_FAILURE_TTL and geocode_failures.get(key)[1] == 'fresh':
+        return found, None
+    g = _cached_fetch(geocode_cache, key, lambda: _geocode(api_key, city))
+    if g.get('ok'):
+        if g.get('data') is not None:
+            return g['data'], None
+        if found is None:
+            return None, CITY_NOT_FOUND
+    elif GEOCODE_FAILURE_TTL:
+        geocode_failures.set(key, True)
+    return found, None
+
+def _location(api_key, city):
+    """Cache key suffix and OpenWeather query params for a city, or an error message."""
+    found, error = resolve_city(api_key, city)
+    if error:
+        return None, None, error
+    if found is None:
+        key, location = ('q',) + parse_city(city), { 'q': city }
+    else:
+        key, location = (found['lat'], found['lon']), { 'lat': found['lat'], 'lon': found['lon'] }
+    prewarmer.touch(key, (api_key, location))
+    return key, location, None
+
 def get_weather(api_key, city):
-    base_url = "https://api.openweathermap.org/data/2.5/weather"
+    key, location, error = _location(api_key, city)
+    if error:
+        return { 'ok': False, 'error': error }
+    return _cached_fetch(weather_cache, ('weather',) + key, lambda: _fetch_weather(api_key, location))
+
+def get_forecast(api_key, city):
+    key, location, error = _location(api_key, city)
+    if error:
+        return { 'ok': False, 'error': error }
+    return _cached_fetch(forecast_cache, ('forecast',) + key, lambda: _fetch_forecast(api_key, location))
+
+def _geocode(api_key, city):
+    params = {
+        'q': ' '.join(city.split()),
+        'limit': 1,
+        'appid': api_key
+    }
+    try:
+        response = upstream.get(upstream.openweather_url('geo/1.0/direct'), params=params)
+        data = jsonutil.loads(response.content)
+        if response.status_code == 200 and isinstance(data, list):
+            # An empty list is a definite "not found" and is memoized like a hit
+            return { 'ok': True, 'data': place(data[0]['lat'], data[0]['lon'], data[0].get('country', '')) if data else None }
+        return { 'ok': False }
+    except Exception:
+        return { 'ok': False }
+
+def _fetch_weather(api_key, location):
+    base_url = upstream.openweather_url('data/2.5/weather')
     params = {
-        'q': city,
+        **location,
         'appid': api_key,
         'units': 'metric'  
     }
 
     try:
-        response = requests.get(base_url, params=params, timeout=10)
-        data = response.json()
+        response = upstream.get(base_url, params=params)
+        data = jsonutil.loads(response.content)
 
         if response.status_code == 200:
             return { 'ok': True, 'data': data }
@@ -32,461 +294,259 @@ def get_weather(api_key, city):
             message = data.get('message', 'Unable to fetch weather data') if isinstance(data, dict) else 'Unable to fetch weather data'
             return { 'ok': False, 'error': f"{response.status_code}: {message}" }
 
+    except upstream.CircuitOpenError:
+        return { 'ok': False, 'error': UPSTREAM_UNAVAILABLE, 'unavailable': True }
     except requests.Timeout:
         return { 'ok': False, 'error': 'Request timed out. Please try again.' }
     except Exception as e:
         return { 'ok': False, 'error': 'Unexpected error fetching weather data.' }
 
-def get_forecast(api_key, city):
-    base_url = "https://api.openweathermap.org/data/2.5/forecast"
+def _fetch_forecast(api_key, location):
+    base_url = upstream.openweather_url('data/2.5/forecast')
     params = {
-        'q': city,
+        **location,
         'appid': api_key,
         'units': 'metric'
     }
     try:
-        response = requests.get(base_url, params=params, timeout=10)
-        data = response.json()
+        response = upstream.get(base_url, params=params)
+        data = jsonutil.loads(response.content)
         if response.status_code == 200:
-            return { 'ok': True, 'data': data }
+            return { 'ok': True, 'data': compact_forecast(data) }
         else:
             message = data.get('message', 'Unable to fetch forecast') if isinstance(data, dict) else 'Unable to fetch forecast'
             return { 'ok': False, 'error': f"{response.status_code}: {message}" }
+    except upstream.CircuitOpenError:
+        return { 'ok': False, 'error': UPSTREAM_UNAVAILABLE, 'unavailable': True }
     except requests.Timeout:
         return { 'ok': False, 'error': 'Forecast request timed out.' }
     except Exception:
         return { 'ok': False, 'error': 'Unexpected error fetching forecast.' }
 
-def build_agriculture_recommendation(crop: str, temperature: float, humidity: float, rainfall: float):
-    alerts = []
+def _prewarm_entry(cache, key, fetch):
+    if not cache.begin_refresh(key):
+        return None
     try:
-        t = float(temperature)
-        h = float(humidity)
-        r = float(rainfall)
-    except Exception:
-        t, h, r = 0.0, 0.0, 0.0
+        return upstream_calls.do(key, lambda: _fetch_and_store(cache, key, fetch))
+    finally:
+        cache.end_refresh(key)
+
+# Background refresh of the PREWARM_TOP_N most-requested cities (0, the default, disables it).
+# Entries expiring within PREWARM_LEAD seconds are refreshed every PREWARM_INTERVAL seconds,
+# spending at most PREWARM_BUDGET upstream calls per minute per process.
+prewarmer = Prewarmer(
+    [
+        ('weather', weather_cache, lambda context: _fetch_weather(*context)),
+        ('forecast', forecast_cache, lambda context: _fetch_forecast(*context)),
+    ],
+    _prewarm_entry,
+    top_n=int(os.environ.get('PREWARM_TOP_N', 0)),
+    interval=float(os.environ.get('PREWARM_INTERVAL', 30)),
+    lead=float(os.environ.get('PREWARM_LEAD', 60)),
+    budget=float(os.environ.get('PREWARM_BUDGET', 30)),
+    half_life=float(os.environ.get('PREWARM_HALF_LIFE', 3600)),
+)
+
+# /readyz answers 503 when this process can only fail or time out: the weather
+# breaker is open with nothing cached to serve stale, or every gunicorn thread of
+# this worker is busy, so a new request would queue. WEB_THREADS must match
+# gunicorn's --threads; READY_MAX_IN_FLIGHT counts requests other than the probe,
+# and 0 (the default for sync workers, which serve one request at a time) turns
+# the check off. Cache warmth is reported but never gates.
+WEB_THREADS = int(os.environ.get('WEB_THREADS', 1))
+READY_MAX_IN_FLIGHT = int(os.environ.get('READY_MAX_IN_FLIGHT', WEB_THREADS - 1))
+_in_flight = 0
+_in_flight_lock = threading.Lock()
+
+# GET /metrics serves Prometheus text for all workers on the host (see metrics.py)
+request_seconds = metrics.registry.histogram(
+    'agrocast_http_request_duration_seconds', 'Time from routing to the last byte sent, per route.', ('route', 'method'))
+requests_total = metrics.registry.counter(
+    'agrocast_http_requests_total', 'Requests answered, per route and status.', ('route', 'method', 'status'))
+upstream_seconds = metrics.registry.histogram(
+    'agrocast_upstream_request_duration_seconds', 'OpenWeather call latency per attempt, per endpoint.', ('endpoint',))
+upstream_total = metrics.registry.counter(
+    'agrocast_upstream_responses_total',
+    'OpenWeather attempts per endpoint by HTTP status, timeout, error or circuit_open.', ('endpoint', 'status'))
+# agrocast_upstream_breaker_state values; higher is worse so workers combine with max
+BREAKER_STATE_VALUES = { breaker.CLOSED: 0, breaker.HALF_OPEN: 1, breaker.OPEN: 2 }
+function_seconds = metrics.registry.histogram(
+    'agrocast_function_duration_seconds', 'Time spent in agriculture computations.', ('function',))
+
+def _observe_upstream(endpoint, outcome, seconds):
+    upstream_total.inc(endpoint, outcome)
+    if seconds is not None:
+        upstream_seconds.observe(seconds, endpoint)
+
+def _cache_lookups():
+    lookups = {}
+    for name, c in (('weather', weather_cache), ('forecast', forecast_cache), ('geocode', geocode_cache)):
+        stats = c.stats()
+        lookups[(name, 'hit')] = stats['hits']
+        lookups[(name, 'stale')] = stats['staleHits']
+        lookups[(name, 'miss')] = stats['misses']
+    stats = result_pages.stats()
+    lookups[('result_page', 'hit')] = stats['hits']
+    lookups[('result_page', 'miss')] = stats['misses']
+    return lookups
+
+metrics.registry.collected_counter(
+    'agrocast_cache_lookups_total', 'Cache lookups by result; stale entries are served while they refresh.',
+    _cache_lookups, ('cache', 'result'))
+metrics.registry.gauge('agrocast_http_requests_in_flight', 'Requests in progress.', lambda: { (): _in_flight })
+metrics.registry.gauge(
+    'agrocast_upstream_requests_in_flight', 'Distinct OpenWeather fetches in progress.',
+    lambda: { (): upstream_calls.in_flight() })
+metrics.registry.gauge(
+    'agrocast_upstream_breaker_state', 'Circuit breaker state per endpoint: 0 closed, 1 half-open, 2 open; the worst worker wins.',
+    lambda: { (name,): BREAKER_STATE_VALUES[state] for name, state in upstream.breaker_states().items() },
+    ('endpoint',), combine=max)
+
+if metrics.METRICS_ENABLED:
+    upstream.set_observer(_observe_upstream)
+    build_agriculture_recommendation = metrics.timed(function_seconds, 'build_agriculture_recommendation')(
+        build_agriculture_recommendation)
+
+# Server-Timing phases: upstream (OpenWeather calls and waits), forecast (averaging),
+# rules (crop rule evaluation) and render (Jinja). Slow requests are logged with them.
+if server_timing.ENABLED:
+    build_agriculture_recommendation = server_timing.timed('rules')(build_agriculture_recommendation)
+    build_agriculture_recommendations = server_timing.timed('rules')(build_agriculture_recommendations)
+    recommend_crops_from_averages = server_timing.timed('rules')(recommend_crops_from_averages)
+    render_template = server_timing.timed('render')(render_template)
+
+@app.before_request
+def _count_request():
+    global _in_flight
+    with _in_flight_lock:
+        _in_flight += 1
+    # Per-request state goes in the WSGI environ: every flask.g/request proxy lookup costs microseconds
+    request.environ['agrocast.started'] = time.perf_counter()
+    if metrics.METRICS_ENABLED:
+        metrics.registry.ensure_flushing()
+    if server_timing.ENABLED:
+        server_timing.start()
 
-    if h > 85:
-        alerts.append('High humidity — fungal disease risk')
-    if t <= 2:
-        alerts.append('Frost risk ahead')
-    if t >= 40:
-        alerts.append('Extreme heat — heat stress risk')
-
-    # Crop-specific recommendation logic with detailed rules
-    recommendation = None
-    
-    # Rice: Needs high temp (20-35°C), high humidity (70-100%), good rainfall
-    if crop == 'Rice':
-        if t < 15:
-            recommendation = 'Rice: Too cold — germination will be slow. Use nursery beds or delay sowing until temp rises above 18°C.'
-        elif t > 38:
-            recommendation = 'Rice: Extreme heat stress — provide shade netting for seedlings, increase irrigation frequency to 2-3 times daily.'
-        elif h < 60:
-            recommendation = 'Rice: Low humidity — increase irrigation to maintain field water level at 5-7 cm depth.'
-        elif r < 5 and t > 28:
-            recommendation = 'Rice: Hot and dry — critical irrigation needed. Maintain 5 cm standing water to prevent heat stress.'
-        elif 20 <= t <= 32 and 70 <= h <= 95 and r >= 10:
-            recommendation = 'Rice: Excellent conditions for transplanting or direct sowing. Maintain 5 cm water depth.'
-        elif r > 25:
-            recommendation = 'Rice: Heavy rainfall — ensure proper drainage. Delay nitrogen application to prevent leaching.'
-        else:
-            recommendation = 'Rice: Moderate conditions — maintain field water level and monitor for blast disease if humidity > 80%.'
-    
-    # Wheat: Cool season (10-25°C), moderate humidity (40-70%), low rainfall preferred
-    elif crop == 'Wheat':
-        if t > 30:
-            recommendation = 'Wheat: Too hot — heat stress during grain filling. Avoid sowing; standing crop needs irrigation every 5-7 days.'
-        elif t < 8:
-            recommendation = 'Wheat: Too cold — slow growth. Use early-maturing varieties or delay sowing by 1-2 weeks.'
-        elif h > 80:
-            recommendation = 'Wheat: High humidity — high risk of rust and powdery mildew. Apply preventive fungicides.'
-        elif r > 15:
-            recommendation = 'Wheat: Excess moisture — delay sowing; ensure well-drained soil. Avoid waterlogging.'
-        elif 12 <= t <= 22 and 40 <= h <= 65 and r < 10:
-            recommendation = 'Wheat: Ideal sowing conditions — optimal temperature and moderate humidity for germination.'
-        else:
-            recommendation = 'Wheat: Suboptimal — if sowing, ensure good drainage and use disease-resistant varieties.'
-    
-    # Maize: Warm (18-32°C), moderate humidity (50-80%), moderate rainfall
-    elif crop == 'Maize':
-        if t < 15:
-            recommendation = 'Maize: Cold stress — delayed germination. Wait for temperature above 18°C or use seed treatment.'
-        elif t > 35:
-            recommendation = 'Maize: Heat stress during pollination — critical irrigation needed at flowering stage to prevent yield loss.'
-        elif h < 40 and t > 28:
-            recommendation = 'Maize: Hot and dry — increase irrigation to 3-4 times weekly. Mulching recommended.'
-        elif h > 85:
-            recommendation = 'Maize: High humidity — monitor for downy mildew and leaf blight. Ensure good air circulation.'
-        elif 20 <= t <= 30 and 50 <= h <= 75 and 5 <= r <= 20:
-            recommendation = 'Maize: Good conditions for sowing — warm temperature with adequate moisture.'
-        elif r > 25:
-            recommendation = 'Maize: Heavy rain — delay sowing; waterlogging will damage roots. Ensure drainage.'
-        else:
-            recommendation = 'Maize: Moderate conditions — proceed with sowing if soil moisture is adequate.'
-    
-    # Cotton: Warm (20-35°C), moderate humidity (50-80%), moderate rainfall
-    elif crop == 'Cotton':
-        if t < 18:
-            recommendation = 'Cotton: Cold conditions — delayed germination. Use seed treatment or delay by 10-15 days.'
-        elif t > 38:
-            recommendation = 'Cotton: Extreme heat — boll shedding risk. Increase irrigation frequency to daily during flowering.'
-        elif h > 85:
-            recommendation = 'Cotton: Very high humidity — high risk of bacterial blight and boll rot. Space plants wider for airflow.'
-        elif h < 45 and t > 30:
-            recommendation = 'Cotton: Hot and dry — critical irrigation needed. Target 6-8 irrigations during crop cycle.'
-        elif 22 <= t <= 32 and 55 <= h <= 75 and 5 <= r <= 15:
-            recommendation = 'Cotton: Optimal conditions — ideal for sowing with good boll development expected.'
-        elif r > 20:
-            recommendation = 'Cotton: Excess rain — delay sowing; waterlogging causes root rot. Ensure raised beds.'
-        else:
-            recommendation = 'Cotton: Suitable conditions — ensure adequate spacing and monitor for whitefly infestation.'
-    
-    # Sugarcane: Warm (20-35°C), high humidity (60-90%), high rainfall preferred
-    elif crop == 'Sugarcane':
-        if t < 18:
-            recommendation = 'Sugarcane: Cold stress — slow ratooning. Delay planting until temperature rises above 20°C.'
-        elif t > 38:
-            recommendation = 'Sugarcane: Extreme heat — reduce tillering. Increase irrigation to maintain soil moisture.'
-        elif h < 50 and t > 30:
-            recommendation = 'Sugarcane: Hot and dry — critical irrigation needed. Maintain 60-70% soil moisture.'
-        elif r < 5 and t > 28:
-            recommendation = 'Sugarcane: Moisture deficit — increase irrigation frequency to weekly. Mulch recommended.'
-        elif 24 <= t <= 32 and 65 <= h <= 85 and r >= 10:
-            recommendation = 'Sugarcane: Excellent conditions — optimal for planting/ratooning with good cane growth expected.'
-        else:
-            recommendation = 'Sugarcane: Moderate conditions — maintain regular irrigation schedule.'
-    
-    # Sorghum (Jowar): Warm (20-35°C), moderate humidity (30-70%), drought tolerant
-    elif crop == 'Sorghum (Jowar)':
-        if t < 18:
-            recommendation = 'Sorghum: Cold conditions — delayed emergence. Wait for temperature above 20°C.'
-        elif t > 38:
-            recommendation = 'Sorghum: Extreme heat — reduce irrigation to avoid waterlogging; drought-tolerant but needs some moisture.'
-        elif h > 80:
-            recommendation = 'Sorghum: High humidity — monitor for grain mold and anthracnose in panicle stage.'
-        elif 22 <= t <= 32 and 40 <= h <= 65 and r < 15:
-            recommendation = 'Sorghum: Ideal drought-tolerant conditions — good for rainfed or minimal irrigation.'
-        else:
-            recommendation = 'Sorghum: Suitable — drought-tolerant crop, proceed with sowing if soil has some moisture.'
-    
-    # Pearl Millet (Bajra): Hot (25-35°C), low humidity (20-60%), very drought tolerant
-    elif crop == 'Pearl Millet (Bajra)':
-        if t < 20:
-            recommendation = 'Bajra: Too cold — germination will be poor. Wait for temperature above 22°C.'
-        elif h > 70:
-            recommendation = 'Bajra: High humidity — downy mildew risk. Use resistant varieties or treat seeds.'
-        elif 25 <= t <= 35 and 30 <= h <= 55 and r < 10:
-            recommendation = 'Bajra: Perfect conditions — ideal for this drought-tolerant crop. Minimal irrigation needed.'
-        else:
-            recommendation = 'Bajra: Suitable — very drought-tolerant, can proceed with sowing even in dry conditions.'
-    
-    # Pigeon Pea (Arhar): Warm (18-30°C), moderate humidity (40-80%), moderate rainfall
-    elif crop == 'Pigeon Pea (Arhar)':
-        if t < 15:
-            recommendation = 'Arhar: Cold conditions — slow growth. Delay sowing until temperature rises above 18°C.'
-        elif t > 32:
-            recommendation = 'Arhar: Heat stress — flower drop may occur. Provide partial shade or increase irrigation.'
-        elif h > 85:
-            recommendation = 'Arhar: High humidity — wilt disease risk. Ensure well-drained soil and wider spacing.'
-        elif 20 <= t <= 28 and 50 <= h <= 75 and 5 <= r <= 15:
-            recommendation = 'Arhar: Good conditions — suitable for sowing with proper spacing for branching.'
-        else:
-            recommendation = 'Arhar: Moderate conditions — proceed with sowing, ensure good drainage.'
-    
-    # Chickpea (Chana): Cool (15-25°C), moderate humidity (30-60%), low rainfall preferred
-    elif crop == 'Chickpea (Chana)':
-        if t > 28:
-            recommendation = 'Chana: Too hot — heat stress during pod filling. Avoid sowing; use early-maturing varieties if needed.'
-        elif t < 10:
-            recommendation = 'Chana: Too cold — slow growth. Wait for temperature above 12°C.'
-        elif h > 70:
-            recommendation = 'Chana: High humidity — ascochyta blight risk. Use treated seeds and resistant varieties.'
-        elif r > 12:
-            recommendation = 'Chana: Excess moisture — delay sowing; ensure well-drained soil to prevent root rot.'
-        elif 15 <= t <= 22 and 35 <= h <= 55 and r < 8:
-            recommendation = 'Chana: Ideal conditions — perfect for rabi sowing with good pod development expected.'
-        else:
-            recommendation = 'Chana: Suitable — proceed with sowing, ensure good drainage.'
-    
-    # Mustard: Cool (10-25°C), moderate humidity (30-70%), low rainfall
-    elif crop == 'Mustard':
-        if t > 28:
-            recommendation = 'Mustard: Too hot — poor seed set. Avoid sowing; standing crop needs irrigation.'
-        elif t < 8:
-            recommendation = 'Mustard: Too cold — slow growth. Delay sowing until temperature above 10°C.'
-        elif h > 75:
-            recommendation = 'Mustard: High humidity — white rust and alternaria blight risk. Apply preventive sprays.'
-        elif r > 10:
-            recommendation = 'Mustard: Excess moisture — delay sowing; ensure drainage to prevent root diseases.'
-        elif 12 <= t <= 22 and 40 <= h <= 65 and r < 8:
-            recommendation = 'Mustard: Excellent conditions — ideal for rabi sowing with good oil content expected.'
-        else:
-            recommendation = 'Mustard: Suitable — proceed with sowing, monitor for aphids.'
-    
-    # Groundnut: Warm (20-30°C), moderate humidity (40-70%), moderate rainfall
-    elif crop == 'Groundnut':
-        if t < 18:
-            recommendation = 'Groundnut: Cold conditions — poor germination. Wait for temperature above 20°C.'
-        elif t > 35:
-            recommendation = 'Groundnut: Heat stress — flower drop. Increase irrigation frequency to maintain soil moisture.'
-        elif h > 80:
-            recommendation = 'Groundnut: High humidity — leaf spot and rust risk. Use wider spacing and fungicides.'
-        elif r > 20:
-            recommendation = 'Groundnut: Excess rain — delay sowing; waterlogging causes pod rot. Ensure raised beds.'
-        elif 22 <= t <= 28 and 45 <= h <= 65 and 5 <= r <= 15:
-            recommendation = 'Groundnut: Good conditions — suitable for sowing with proper spacing for pegging.'
-        else:
-            recommendation = 'Groundnut: Moderate conditions — proceed with sowing, ensure good drainage.'
-    
-    # Soybean: Warm (20-30°C), moderate humidity (50-80%), moderate rainfall
-    elif crop == 'Soybean':
-        if t < 18:
-            recommendation = 'Soybean: Cold conditions — slow emergence. Wait for temperature above 20°C.'
-        elif t > 32:
-            recommendation = 'Soybean: Heat stress — flower and pod drop. Increase irrigation during flowering.'
-        elif h > 85:
-            recommendation = 'Soybean: High humidity — bacterial blight and rust risk. Use resistant varieties.'
-        elif 22 <= t <= 28 and 55 <= h <= 75 and 5 <= r <= 15:
-            recommendation = 'Soybean: Optimal conditions — ideal for sowing with good nodulation expected.'
-        else:
-            recommendation = 'Soybean: Suitable — proceed with sowing, ensure proper seed inoculation.'
-    
-    # Barley: Cool (8-22°C), moderate humidity (30-60%), low rainfall
-    elif crop == 'Barley':
-        if t > 25:
-            recommendation = 'Barley: Too hot — poor grain quality. Avoid sowing; use early varieties if needed.'
-        elif t < 5:
-            recommendation = 'Barley: Too cold — delayed emergence. Wait for temperature above 8°C.'
-        elif h > 70:
-            recommendation = 'Barley: High humidity — powdery mildew and rust risk. Apply preventive fungicides.'
-        elif r > 12:
-            recommendation = 'Barley: Excess moisture — delay sowing; ensure well-drained soil.'
-        elif 10 <= t <= 20 and 35 <= h <= 55 and r < 8:
-            recommendation = 'Barley: Ideal conditions — perfect for rabi sowing with good malting quality expected.'
-        else:
-            recommendation = 'Barley: Suitable — proceed with sowing, ensure good drainage.'
-    
-    # Tea: Moderate (18-28°C), high humidity (70-100%), high rainfall
-    elif crop == 'Tea':
-        if t < 15:
-            recommendation = 'Tea: Cold stress — reduced growth. Protect young plants or delay planting.'
-        elif t > 30:
-            recommendation = 'Tea: Heat stress — sunscald on leaves. Provide shade netting or increase irrigation.'
-        elif h < 60:
-            recommendation = 'Tea: Low humidity — reduced quality. Increase irrigation to maintain humidity > 70%.'
-        elif r < 8:
-            recommendation = 'Tea: Moisture deficit — critical irrigation needed. Maintain 60-70% soil moisture.'
-        elif 20 <= t <= 26 and 75 <= h <= 95 and r >= 10:
-            recommendation = 'Tea: Excellent conditions — optimal for new flush growth with good quality expected.'
-        else:
-            recommendation = 'Tea: Moderate conditions — maintain regular irrigation and shade management.'
-    
-    # Coffee: Moderate (18-24°C), high humidity (60-90%), high rainfall
-    elif crop == 'Coffee':
-        if t > 26:
-            recommendation = 'Coffee: Heat stress — berry drop. Provide shade trees or increase irrigation.'
-        elif t < 15:
-            recommendation = 'Coffee: Cold stress — delayed flowering. Protect plants or delay planting.'
-        elif h < 55:
-            recommendation = 'Coffee: Low humidity — reduced bean quality. Increase irrigation to maintain humidity.'
-        elif r < 8:
-            recommendation = 'Coffee: Moisture deficit — critical irrigation needed, especially during flowering.'
-        elif 18 <= t <= 24 and 65 <= h <= 85 and r >= 10:
-            recommendation = 'Coffee: Optimal conditions — ideal for flowering and berry development.'
-        else:
-            recommendation = 'Coffee: Suitable — maintain shade and regular irrigation schedule.'
-    
-    # Banana: Warm (20-35°C), high humidity (60-90%), high rainfall
-    elif crop == 'Banana':
-        if t < 18:
-            recommendation = 'Banana: Cold stress — slow growth. Protect plants or delay planting.'
-        elif t > 38:
-            recommendation = 'Banana: Extreme heat — leaf scorch. Increase irrigation to daily and provide shade.'
-        elif h < 55:
-            recommendation = 'Banana: Low humidity — reduced bunch size. Increase irrigation frequency.'
-        elif r < 8:
-            recommendation = 'Banana: Moisture deficit — critical irrigation needed. Maintain 70-80% soil moisture.'
-        elif 24 <= t <= 32 and 65 <= h <= 85 and r >= 10:
-            recommendation = 'Banana: Excellent conditions — optimal for planting and bunch development.'
-        else:
-            recommendation = 'Banana: Suitable — maintain regular irrigation and wind protection.'
-    
-    # Potato: Cool (10-20°C), moderate humidity (40-80%), moderate rainfall
-    elif crop == 'Potato':
-        if t > 25:
-            recommendation = 'Potato: Too hot — tuberization impaired. Avoid planting; use heat-tolerant varieties if needed.'
-        elif t < 8:
-            recommendation = 'Potato: Too cold — slow growth. Wait for temperature above 10°C.'
-        elif h > 85:
-            recommendation = 'Potato: High humidity — late blight risk. Apply preventive fungicides and ensure airflow.'
-        elif r > 15:
-            recommendation = 'Potato: Excess moisture — delay planting; waterlogging causes tuber rot. Ensure raised beds.'
-        elif 12 <= t <= 20 and 50 <= h <= 75 and 5 <= r <= 12:
-            recommendation = 'Potato: Ideal conditions — perfect for planting with good tuber development expected.'
-        else:
-            recommendation = 'Potato: Moderate conditions — proceed with planting, ensure good drainage.'
-    
-    # Onion: Moderate (13-25°C), moderate humidity (40-70%), low rainfall
-    elif crop == 'Onion':
-        if t > 28:
-            recommendation = 'Onion: Too hot — bolting risk. Avoid planting; use short-day varieties if needed.'
-        elif t < 10:
-            recommendation = 'Onion: Too cold — slow growth. Wait for temperature above 13°C.'
-        elif h > 75:
-            recommendation = 'Onion: High humidity — purple blotch and downy mildew risk. Ensure good airflow.'
-        elif r > 10:
-            recommendation = 'Onion: Excess moisture — delay planting; waterlogging causes bulb rot.'
-        elif 15 <= t <= 22 and 45 <= h <= 65 and r < 8:
-            recommendation = 'Onion: Excellent conditions — ideal for planting with good bulb formation expected.'
-        else:
-            recommendation = 'Onion: Suitable — proceed with planting, ensure well-drained soil.'
-    
-    # Tomato: Moderate (18-28°C), moderate humidity (50-80%), moderate rainfall
-    elif crop == 'Tomato':
-        if t > 32:
-            recommendation = 'Tomato: Heat stress — flower drop and fruit cracking. Provide shade netting or increase irrigation.'
-        elif t < 15:
-            recommendation = 'Tomato: Cold stress — poor fruit set. Use greenhouse or delay planting.'
-        elif h > 85:
-            recommendation = 'Tomato: High humidity — early blight and bacterial spot risk. Use wider spacing and fungicides.'
-        elif r > 15:
-            recommendation = 'Tomato: Excess rain — delay planting; waterlogging causes root rot. Ensure raised beds.'
-        elif 20 <= t <= 26 and 55 <= h <= 75 and 5 <= r <= 12:
-            recommendation = 'Tomato: Optimal conditions — ideal for planting with good fruit quality expected.'
-        else:
-            recommendation = 'Tomato: Moderate conditions — proceed with planting, provide support and monitor for pests.'
-
-    # Fallback if crop not recognized
-    if recommendation is None:
-        recommendation = f'{crop}: Analyze temperature ({t}°C), humidity ({h}%), and rainfall ({r}mm) against crop-specific requirements before proceeding.'
-
-    # Specialized suggestions
-    irrigation = 'Maintain current irrigation schedule.'
-    if r < 3 and t > 32:
-        irrigation = 'Increase irrigation frequency due to hot and dry conditions.'
-    elif r >= 10:
-        irrigation = 'Delay irrigation — sufficient recent rainfall.'
-    elif r < 5 and t > 28:
-        irrigation = 'Moderate irrigation needed — maintain soil moisture.'
-
-    fertilizer = 'Apply NPK as per schedule.'
-    if r >= 10:
-        fertilizer = 'Avoid nitrogen today — rain may leach nutrients.'
-    elif h > 85:
-        fertilizer = 'Delay foliar sprays — high humidity can reduce efficacy.'
-    elif t > 30:
-        fertilizer = 'Reduce nitrogen during heat stress — focus on potassium for stress tolerance.'
-
-    sowing_window = 'Neutral'
-    if crop == 'Rice' and 20 <= t <= 35 and r > 10:
-        sowing_window = 'Favorable for sowing/transplanting.'
-    elif crop == 'Wheat' and 10 <= t <= 25 and r < 10:
-        sowing_window = 'Favorable cool and relatively dry window.'
-    elif crop == 'Maize' and 18 <= t <= 30 and r >= 5:
-        sowing_window = 'Favorable — warm with some moisture.'
-    elif crop in ['Chickpea (Chana)', 'Mustard', 'Barley'] and 12 <= t <= 22 and r < 10:
-        sowing_window = 'Favorable rabi sowing window.'
-    elif crop in ['Sorghum (Jowar)', 'Pearl Millet (Bajra)'] and 22 <= t <= 32 and r < 15:
-        sowing_window = 'Favorable kharif sowing window.'
-
-    pest_disease_risks = []
-    if h > 85:
-        pest_disease_risks.append('Fungal diseases likely — ensure field airflow and monitor leaves.')
-    if crop == 'Cotton' and h > 75:
-        pest_disease_risks.append('Whiteflies/aphids risk — inspect underside of leaves.')
-    if crop == 'Rice' and 25 <= t <= 32 and h > 80:
-        pest_disease_risks.append('Blast/BLB risk — maintain proper spacing and drainage.')
-    if crop == 'Wheat' and h > 70:
-        pest_disease_risks.append('Rust and powdery mildew risk — apply preventive fungicides.')
-    if crop == 'Tomato' and h > 80:
-        pest_disease_risks.append('Early blight risk — use wider spacing and copper-based fungicides.')
-
-    post_harvest = None
-    if h < 60 and r == 0:
-        post_harvest = 'Good window for harvesting/drying — low humidity and no rain.'
+@app.after_request
+def _record_status(response):
+    environ = request.environ
+    environ['agrocast.status'] = response.status_code
+    spans = server_timing.current()
+    if server_timing.SERVER_TIMING and spans is not None:
+        # Streamed bodies are still to come: their phases only reach the slow-request log
+        response.headers['Server-Timing'] = server_timing.header(spans, time.perf_counter() - environ['agrocast.started'])
+    return response
 
+@app.teardown_request
+def _uncount_request(exc):
+    global _in_flight
+    req = request._get_current_object()
+    started = req.environ.pop('agrocast.started', None)
+    if started is None:
+        # Contexts pushed without dispatching (test_request_context) were never counted
+        return
+    with _in_flight_lock:
+        _in_flight -= 1
+    # Streamed responses tear down after the last chunk, so this covers the whole body
+    elapsed = time.perf_counter() - started
+    status = req.environ.get('agrocast.status', 500)
+    if metrics.METRICS_ENABLED:
+        route = req.url_rule.rule if req.url_rule is not None else 'unmatched'
+        request_seconds.observe(elapsed, route, req.method)
+        requests_total.inc(route, req.method, status)
+    spans = server_timing.finish()
+    if spans is not None and server_timing.SLOW_REQUEST_MS and elapsed * 1000 >= server_timing.SLOW_REQUEST_MS:
+        app.logger.warning('Slow request: %s %s -> %s in %.1f ms (%s)', req.method, req.full_path.rstrip('?'), status,
+                           elapsed * 1000, server_timing.header(spans, elapsed))
+
+def _probe_cache(cache):
+    # This process's counters only: counting entries is a query per probe with CACHE_BACKEND=sqlite
+    lookups = cache.hits + cache.stale_hits + cache.misses
     return {
-        'crop': crop,
-        'recommendation': recommendation,
-        'alerts': alerts,
-        'irrigation': irrigation,
-        'fertilizer': fertilizer,
-        'sowingWindow': sowing_window,
-        'pestDiseaseRisks': pest_disease_risks,
-        'postHarvest': post_harvest
+        'warm': cache.hits + cache.stale_hits + cache.stores > 0,
+        'hitRatio': round((cache.hits + cache.stale_hits) / lookups, 4) if lookups else None,
     }
 
-def average_conditions_from_forecast(forecast_data: dict):
-    if not forecast_data or 'list' not in forecast_data:
-        return { 'avgTemp': None, 'avgHumidity': None, 'avgRainfall': None }
-    temps = []
-    hums = []
-    rains = []
-    for item in forecast_data.get('list', [])[:24]:  # next ~3 days (24 x 3h = 72h); take 24 for lighter calc
-        main = item.get('main', {})
-        temps.append(main.get('temp'))
-        hums.append(main.get('humidity'))
-        rain_obj = item.get('rain', {})
-        r = 0.0
-        if isinstance(rain_obj, dict):
-            r = rain_obj.get('3h') or rain_obj.get('1h') or 0.0
-        rains.append(r)
-    temps = [t for t in temps if isinstance(t, (int, float))]
-    hums = [h for h in hums if isinstance(h, (int, float))]
-    rains = [r for r in rains if isinstance(r, (int, float))]
-    def avg(arr):
-        return round(sum(arr)/len(arr), 1) if arr else None
-    return { 'avgTemp': avg(temps), 'avgHumidity': avg(hums), 'avgRainfall': round(sum(rains), 1) if rains else None }
-
-def recommend_crops_from_averages(avgTemp, avgHumidity, avgRainfall):
-    # Very simple climate suitability bands (illustrative)
-    crop_rules = [
-        { 'name': 'Rice', 't': (20, 35), 'h': (70, 100), 'r_min': 15 },
-        { 'name': 'Wheat', 't': (10, 25), 'h': (30, 70), 'r_min': 0 },
-        { 'name': 'Maize', 't': (18, 32), 'h': (40, 80), 'r_min': 5 },
-        { 'name': 'Cotton', 't': (20, 35), 'h': (40, 80), 'r_min': 5 },
-        { 'name': 'Sugarcane', 't': (20, 35), 'h': (50, 90), 'r_min': 10 },
-        { 'name': 'Sorghum (Jowar)', 't': (20, 35), 'h': (30, 70), 'r_min': 0 },
-        { 'name': 'Pearl Millet (Bajra)', 't': (20, 35), 'h': (20, 60), 'r_min': 0 },
-        { 'name': 'Pigeon Pea (Arhar)', 't': (18, 30), 'h': (40, 80), 'r_min': 5 },
-        { 'name': 'Chickpea (Chana)', 't': (15, 25), 'h': (30, 60), 'r_min': 0 },
-        { 'name': 'Mustard', 't': (10, 25), 'h': (30, 70), 'r_min': 0 },
-        { 'name': 'Groundnut', 't': (20, 30), 'h': (40, 70), 'r_min': 5 },
-        { 'name': 'Soybean', 't': (20, 30), 'h': (50, 80), 'r_min': 5 },
-        { 'name': 'Barley', 't': (8, 22), 'h': (30, 60), 'r_min': 0 },
-        { 'name': 'Tea', 't': (18, 28), 'h': (70, 100), 'r_min': 10 },
-        { 'name': 'Coffee', 't': (18, 24), 'h': (60, 90), 'r_min': 10 },
-        { 'name': 'Banana', 't': (20, 35), 'h': (60, 90), 'r_min': 10 },
-        { 'name': 'Potato', 't': (10, 20), 'h': (40, 80), 'r_min': 0 },
-        { 'name': 'Onion', 't': (13, 25), 'h': (40, 70), 'r_min': 0 },
-        { 'name': 'Tomato', 't': (18, 28), 'h': (50, 80), 'r_min': 0 },
-    ]
-    recos = []
-    for rule in crop_rules:
-        t_ok = (avgTemp is not None) and (rule['t'][0] <= avgTemp <= rule['t'][1])
-        h_ok = (avgHumidity is not None) and (rule['h'][0] <= avgHumidity <= rule['h'][1])
-        r_ok = (avgRainfall is None) or (avgRainfall >= rule['r_min'])
-        if t_ok and h_ok and r_ok:
-            recos.append(rule['name'])
-    return recos[:10]
+def readiness(in_flight):
+    """``(payload, status)`` for /readyz given the other requests in progress; in-memory reads only."""
+    breakers = upstream.breaker_states()
+    weather = _probe_cache(weather_cache)
+    reasons = []
+    if upstream.breaker_rejecting('data/2.5/weather') and not weather['warm']:
+        reasons.append('weather upstream unavailable and nothing cached')
+    if READY_MAX_IN_FLIGHT and in_flight >= READY_MAX_IN_FLIGHT:
+        reasons.append(f'all {in_flight + 1} worker threads busy')
+    payload = {
+        'ready': not reasons,
+        'reasons': reasons,
+        'cache': {
+            'weather': weather,
+            'forecast': _probe_cache(forecast_cache),
+        },
+        'breakers': breakers,
+        'inFlight': in_flight,
+        'upstreamInFlight': upstream_calls.in_flight(),
+    }
+    return payload, 200 if not reasons else 503
+
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    """Liveness: the worker answers. No rendering, no I/O."""
+    return json_response({ 'ok': True })
+
+@app.route('/readyz', methods=['GET'])
+def readyz():
+    with _in_flight_lock:
+        # Not counting this request
+        in_flight = _in_flight - 1
+    payload, status = readiness(in_flight)
+    return json_response(payload), status
+
+@app.route('/metrics', methods=['GET'])
+def metrics_text():
+    return app.response_class(metrics.registry.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/cache/stats', methods=['GET'])
+def cache_stats():
+    """Hit ratios of this process's caches, pre-warming activity, upstream breakers, rendered pages and compressed bodies"""
+    return json_response({
+        'weather': weather_cache.stats(),
+        'forecast': forecast_cache.stats(),
+        'geocode': geocode_cache.stats(),
+        'prewarm': prewarmer.stats(),
+        'breakers': upstream.breaker_stats(),
+        'resultPages': result_pages.stats(),
+        'compression': compression.compressed_bodies.stats(),
+    })
 
 @app.route('/api/weather', methods=['GET'])
 def api_weather():
-    """API endpoint for weather data - used by static frontend"""
+    """API endpoint for weather data - used by static frontend
+
+    Pass fields=a,b.c to receive only those (dotted) paths of the payload.
+    """
     city = (request.args.get('city') or '').strip()
     if not city:
-        return jsonify({ 'ok': False, 'error': 'City is required' }), 400
+        return json_response({ 'ok': False, 'error': 'City is required' }), 400
     
     api_key = os.environ.get('OPENWEATHER_API_KEY') or getattr(var, 'key', '')
     if not api_key:
-        return jsonify({ 'ok': False, 'error': 'API key is not configured' }), 500
+        return json_response({ 'ok': False, 'error': 'API key is not configured' }), 500
     
     w = get_weather(api_key, city)
     if w.get('ok'):
-        return jsonify({ 'ok': True, 'data': w.get('data') }), 200
+        # Optional projection, e.g. fields=name,main.temp,weather
+        fields = [f.strip() for f in (request.args.get('fields') or '').split(',') if f.strip()]
+
+        def build():
+            data = jsonutil.project(w.get('data'), fields) if fields else w.get('data')
+            payload = { 'ok': True, 'data': data }
+            if w.get('stale'):
+                payload['stale'] = True
+            return payload
+        return cached_response([w], (fields, bool(w.get('stale'))), build)
     else:
-        return jsonify({ 'ok': False, 'error': w.get('error') }), 502
+        return json_response({ 'ok': False, 'error': w.get('error') }), 502
 
 @app.route('/agriculture/recommendation', methods=['GET'])
 def agriculture_recommendation():
@@ -497,40 +557,183 @@ def agriculture_recommendation():
     city = (request.args.get('city') or '').strip()
 
     if not crop or temperature is None or humidity is None:
-        return jsonify({ 'error': 'Missing required parameters: crop, temperature, humidity' }), 400
+        return json_response({ 'error': 'Missing required parameters: crop, temperature, humidity' }), 400
 
     # If rainfall not provided or zero, try to estimate from forecast
     used_rainfall = rainfall if rainfall is not None else 0.0
+    sources = []
     if (rainfall is None or rainfall == 0.0) and city:
         api_key = os.environ.get('OPENWEATHER_API_KEY') or getattr(var, 'key', '')
         if api_key:
             f = get_forecast(api_key, city)
             if f.get('ok'):
-                av = average_conditions_from_forecast(f.get('data'))
+                sources.append(f)
+                av = _forecast_averages(f, DEFAULT_HORIZON_HOURS)
                 # Use total rainfall over next period as proxy
                 if av.get('avgRainfall') is not None:
                     used_rainfall = float(av.get('avgRainfall'))
     if used_rainfall is None:
         used_rainfall = 0.0
 
-    result = build_agriculture_recommendation(crop, temperature, humidity, used_rainfall)
-    result['usedRainfall'] = used_rainfall
-    return jsonify(result)
+    def build():
+        result = build_agriculture_recommendation(crop, temperature, humidity, used_rainfall)
+        result['usedRainfall'] = used_rainfall
+        return result
+    # Without a forecast the advice only depends on the inputs; reuse it as long as current weather
+    return cached_response(sources, (crop, temperature, humidity, used_rainfall), build, max_age=weather_cache.ttl)
+
+def _is_number_list(values):
+    return isinstance(values, list) and all(type(v) in (int, float) for v in values)
+
+def recommendations_batch(payload):
+    """``(payload, status)`` for a decoded /agriculture/recommendations:batch body.
+
+    Body: {"crop": [...], "temperature": [...], "humidity": [...], "rainfall": [...]}
+    with rainfall optional (defaults to 0). Results come back in input order.
+    """
+    if not isinstance(payload, dict):
+        return { 'error': 'Expected a JSON object body' }, 400
+    crops = payload.get('crop')
+    temperatures = payload.get('temperature')
+    humidities = payload.get('humidity')
+    rainfalls = payload.get('rainfall')
+
+    if not isinstance(crops, list) or not isinstance(temperatures, list) or not isinstance(humidities, list):
+        return { 'error': 'Missing required arrays: crop, temperature, humidity' }, 400
+    if rainfalls is None:
+        rainfalls = [0.0] * len(crops)
+    if len(crops) > BATCH_MAX_ROWS:
+        return { 'error': f'Batch too large: at most {BATCH_MAX_ROWS} rows' }, 413
+    if not all(isinstance(c, str) for c in crops):
+        return { 'error': 'crop must be an array of strings' }, 400
+    if not all(_is_number_list(a) for a in (temperatures, humidities, rainfalls)):
+        return { 'error': 'temperature, humidity and rainfall must be arrays of numbers' }, 400
+
+    try:
+        results = build_agriculture_recommendations([c.strip() for c in crops], temperatures, humidities, rainfalls)
+    except ValueError as e:
+        return { 'error': str(e) }, 400
+    return { 'results': results }, 200
+
+@app.route('/agriculture/recommendations:batch', methods=['POST'])
+def agriculture_recommendations_batch():
+    """Evaluate many (crop, temperature, humidity, rainfall) rows in one call; see recommendations_batch."""
+    payload, status = recommendations_batch(_json_body())
+    return json_response(payload), status
+
+HORIZON_ERROR = 'horizon must be 24h, 48h, 72h, 5d or a number of hours up to 120'
 
 @app.route('/agriculture/crop-recommendations', methods=['GET'])
 def crop_recommendations():
     city = (request.args.get('city') or '').strip()
     api_key = os.environ.get('OPENWEATHER_API_KEY') or getattr(var, 'key', '')
     if not city:
-        return jsonify({ 'error': 'City is required' }), 400
+        return json_response({ 'error': 'City is required' }), 400
+    hours = parse_horizon(request.args.get('horizon'))
+    if hours is None:
+        return json_response({ 'error': HORIZON_ERROR }), 400
+    window = (request.args.get('window') or '').strip().lower()
+    if window not in ('', 'day'):
+        return json_response({ 'error': "window must be 'day'" }), 400
     if not api_key:
-        return jsonify({ 'error': 'API key is not configured' }), 500
+        return json_response({ 'error': 'API key is not configured' }), 500
     f = get_forecast(api_key, city)
     if not f.get('ok'):
-        return jsonify({ 'error': f.get('error', 'Failed to fetch forecast') }), 502
-    averages = average_conditions_from_forecast(f.get('data'))
-    recos = recommend_crops_from_averages(averages.get('avgTemp'), averages.get('avgHumidity'), averages.get('avgRainfall'))
-    return jsonify({ 'city': city, 'averages': averages, 'recommendedCrops': recos })
+        return json_response({ 'error': f.get('error', 'Failed to fetch forecast') }), 502
+    return cached_response([f], (city, hours, window), lambda: _crop_recommendations_from(f, city, hours, daily=window == 'day'))
+
+# The app's average_conditions_from_forecast: parse (once per payload) plus horizon averages
+_forecast_averages = metrics.timed(function_seconds, 'forecast_averages')(
+    server_timing.timed('forecast')(payloads.forecast_averages))
+
+def _crop_recommendations_for(api_key, city, hours=DEFAULT_HORIZON_HOURS, daily=False):
+    return _crop_recommendations_from(get_forecast(api_key, city), city, hours, daily)
+
+def _crop_recommendations_from(f, city, hours=DEFAULT_HORIZON_HOURS, daily=False):
+    return payloads.crop_recommendations(f, city, recommend_crops_from_averages, hours, daily, averages=_forecast_averages)
+
+def parse_crop_batch(payload):
+    """``(cities, hours, deadline, error)`` from a decoded /agriculture/crop-recommendations:batch body.
+
+    error is a ``(payload, status)`` response when the body is invalid.
+    """
+    if not isinstance(payload, dict):
+        return None, None, None, ({ 'error': 'Expected a JSON object body' }, 400)
+    cities = payload.get('cities')
+    if not isinstance(cities, list) or not cities or not all(isinstance(c, str) and c.strip() for c in cities):
+        return None, None, None, ({ 'error': 'cities must be a non-empty array of city names' }, 400)
+    if len(cities) > FANOUT_MAX_CITIES:
+        return None, None, None, ({ 'error': f'Too many cities: at most {FANOUT_MAX_CITIES}' }, 413)
+    deadline = payload.get('deadline', FANOUT_DEADLINE)
+    if type(deadline) not in (int, float) or deadline <= 0:
+        return None, None, None, ({ 'error': 'deadline must be a positive number of seconds' }, 400)
+    horizon = payload.get('horizon')
+    hours = parse_horizon(str(horizon)) if horizon is not None else DEFAULT_HORIZON_HOURS
+    if hours is None:
+        return None, None, None, ({ 'error': HORIZON_ERROR }, 400)
+    return [c.strip() for c in cities], hours, min(deadline, FANOUT_DEADLINE), None
+
+@app.route('/agriculture/crop-recommendations:batch', methods=['POST'])
+def crop_recommendations_batch():
+    """Crop recommendations for many cities at once.
+
+    Body: {"cities": [...], "deadline": seconds (optional, capped at FANOUT_DEADLINE),
+    "horizon": same values as the single-city route (optional)}.
+    Each city gets its own result or error, in input order; cities still pending
+    at the deadline come back with an error and 'complete' is false.
+    """
+    cities, hours, deadline, error = parse_crop_batch(_json_body())
+    if error:
+        return json_response(error[0]), error[1]
+    api_key = os.environ.get('OPENWEATHER_API_KEY') or getattr(var, 'key', '')
+    if not api_key:
+        return json_response({ 'error': 'API key is not configured' }), 500
+
+    futures = [fanout_pool.submit(_crop_recommendations_for, api_key, city, hours) for city in cities]
+    done, pending = wait(futures, timeout=deadline)
+    results = []
+    for city, future in zip(cities, futures):
+        if future in done:
+            try:
+                results.append(future.result())
+            except Exception:
+                results.append({ 'city': city, 'error': 'Unexpected error fetching forecast.' })
+        else:
+            # Not-yet-started work is dropped; running fetches finish and warm the cache
+            future.cancel()
+            results.append({ 'city': city, 'error': DEADLINE_EXCEEDED })
+    return json_response({ 'results': results, 'complete': not pending })
+
+def _dashboard_payload(city, crop, w, f):
+    """Combine a weather and a forecast result into the /api/dashboard response and status."""
+    return payloads.dashboard(city, crop, w, f, _crop_recommendations_from, build_agriculture_recommendation)
+
+@app.route('/api/dashboard', methods=['GET'])
+def api_dashboard():
+    """Weather, forecast averages, recommended crops and (with crop=) a crop recommendation in one call"""
+    city = (request.args.get('city') or '').strip()
+    crop = (request.args.get('crop') or '').strip()
+    if not city:
+        return json_response({ 'ok': False, 'error': 'City is required' }), 400
+
+    api_key = os.environ.get('OPENWEATHER_API_KEY') or getattr(var, 'key', '')
+    if not api_key:
+        return json_response({ 'ok': False, 'error': 'API key is not configured' }), 500
+
+    forecast = fanout_pool.submit(get_forecast, api_key, city)
+    w = get_weather(api_key, city)
+    # If the pool is still busy with fan-out work, fetch here rather than queue behind it
+    if forecast.cancel():
+        f = get_forecast(api_key, city)
+    else:
+        # The pool thread's spans are not recorded; count the wait instead
+        with server_timing.span('upstream'):
+            f = forecast.result()
+    if not w.get('ok'):
+        return json_response(_dashboard_payload(city, crop, w, f)[0]), 502
+    # A failed forecast has no tag, so the response is sent without validators
+    variant = (city, crop, bool(w.get('stale') or f.get('stale')))
+    return cached_response([w, f], variant, lambda: _dashboard_payload(city, crop, w, f)[0])
 
 @app.route('/', methods=['GET', 'POST'])
 def index():
@@ -544,9 +747,17 @@ def index():
     # Clean landing page, no weather data rendered here
     return render_template('index.html', error=error)
 
-@app.route('/result', methods=['GET'])
-def result():
-    city = (request.args.get('city') or '').strip()
+_result_head = None
+
+def _result_head_bytes():
+    # The <head> (all of the page's CSS) does not depend on the request
+    global _result_head
+    if _result_head is None:
+        _result_head = (render_template('result_head.html') + '\n').encode('utf-8')
+    return _result_head
+
+def _result_body_bytes(city):
+    """Fetch the weather and render everything from <body> on, from result_pages when possible."""
     error = None
     weather_payload = None
 
@@ -568,7 +779,35 @@ def result():
     if weather_payload and 'weather' in weather_payload and len(weather_payload['weather']) > 0:
         weather_condition = weather_payload['weather'][0]['main'].lower()
 
-    return render_template('result.html', weather_data=weather_payload, error=error, weather_condition=weather_condition, city=city)
+    def render():
+        return render_template('result_body.html', weather_data=weather_payload, error=error, weather_condition=weather_condition, city=city).encode('utf-8')
+    if weather_payload is None or weather_payload.get('dt') is None:
+        return render()
+    key = (city, weather_payload['dt'], weather_condition)
+    body = result_pages.get(key)
+    if body is None:
+        body = render()
+        result_pages.set(key, body)
+    return body
+
+@app.route('/result', methods=['GET'])
+def result():
+    city = (request.args.get('city') or '').strip()
+    if not RESULT_STREAM:
+        return app.response_class(_result_head_bytes() + _result_body_bytes(city), mimetype='text/html')
+
+    def generate():
+        # The browser starts on the stylesheets and fonts while the weather is fetched
+        yield _result_head_bytes()
+        yield _result_body_bytes(city)
+    return app.response_class(stream_with_context(generate()), mimetype='text/html')
+
+def _precompress_pages():
+    # The landing page renders the same bytes for every GET; compress it once per worker
+    with app.test_request_context('/'):
+        compression.precompress(render_template('index.html', error=None).encode('utf-8'))
+
+_precompress_pages()
 
 if __name__ == "__main__":
     app.run(port=int(os.environ.get("PORT", 8080)), host='0.0.0.0', debug=True)
@@ -0,0 +1,512 @@
+"""
+Optional ASGI entry point for the JSON API routes.
+
+Serves /api/weather, /api/dashboard, /agriculture/* (including the POST :batch
+routes) and the /healthz and /readyz probes with non-blocking upstream I/O, so a
+single process can hold hundreds of concurrent OpenWeather waits:
+
+    pip install -r requirements-async.txt
+    uvicorn asgi:app --host 0.0.0.0 --port 8080
+
+With CACHE_BACKEND=sqlite, cache reads and writes run in the default thread pool
+so a locked database file never stalls the event loop. The Flask app in app.py
+stays the sync fallback and still serves the HTML pages.
+"""
+import asyncio
+import os
+import time
+from urllib.parse import parse_qs
+
+import httpx
+from werkzeug.http import parse_etags, quote_etag
+
+import compression
+import jsonutil
+import upstream
+import var
+from agriculture import build_agriculture_recommendation
+from app import (
+    CITY_NOT_FOUND,
+    CORS_MAX_AGE,
+    DEADLINE_EXCEEDED,
+    GEOCODE_FAILURE_TTL,
+    HORIZON_ERROR,
+    UPSTREAM_UNAVAILABLE,
+    UPSTREAM_WAIT_TIMEOUT,
+    _crop_recommendations_from,
+    _dashboard_payload,
+    _forecast_averages,
+    forecast_cache,
+    geocode_cache,
+    geocode_failures,
+    parse_crop_batch,
+    prewarmer,
+    readiness,
+    recommendations_batch,
+    stamp_entry,
+    validators,
+    weather_cache,
+)
+from cities import get_city_index, parse_city, place
+from forecast_series import DEFAULT_HORIZON_HOURS, compact_forecast, parse_horizon
+from shared_cache import SQLiteCache
+
+ASYNC_MAX_CONNECTIONS = int(os.environ.get('ASYNC_MAX_CONNECTIONS', 200))
+
+# httpx's counterparts of requests.ConnectionError, which upstream.get retries:
+# failed or timed-out connects, and connections dropped or refused mid-exchange
+_RETRY_ERRORS = (httpx.NetworkError, httpx.ConnectTimeout, httpx.RemoteProtocolError, httpx.ProxyError)
+
+_client = None
+_inflight = {}
+_background = set()
+# HTTP requests in progress, for /readyz
+_requests_in_flight = 0
+
+
+def _get_client():
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(upstream.READ_TIMEOUT, connect=upstream.CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=ASYNC_MAX_CONNECTIONS, max_keepalive_connections=ASYNC_MAX_CONNECTIONS),
+        )
+    return _client
+
+
+async def _get(url, params):
+    # Same retry, circuit-breaker and observer policy as upstream.get
+    client = _get_client()
+    breaker = upstream.breaker_for(url)
+    for attempt in range(upstream.MAX_RETRIES + 1):
+        if not breaker.allow():
+            upstream._observe(breaker.name, 'circuit_open', None)
+            raise upstream.CircuitOpenError(breaker.name)
+        started = time.monotonic()
+        try:
+            response = await client.get(url, params=params)
+        except _RETRY_ERRORS as e:
+            breaker.record(True)
+            upstream._observe(breaker.name, 'timeout' if isinstance(e, httpx.TimeoutException) else 'error', time.monotonic() - started)
+            if attempt == upstream.MAX_RETRIES:
+                raise
+        except Exception as e:
+            # Includes non-HTTPError failures such as InvalidURL, which must still release a half-open probe
+            breaker.record(True)
+            upstream._observe(breaker.name, 'timeout' if isinstance(e, httpx.TimeoutException) else 'error', time.monotonic() - started)
+            raise
+        else:
+            elapsed = time.monotonic() - started
+            breaker.record(response.status_code in upstream.RETRY_STATUSES, elapsed)
+            upstream._observe(breaker.name, response.status_code, elapsed)
+            if response.status_code not in upstream.RETRY_STATUSES or attempt == upstream.MAX_RETRIES:
+                return response
+        await asyncio.sleep(upstream._backoff(attempt))
+
+
+async def _fetch(path, api_key, location, unavailable, timed_out, unexpected, shape=None):
+    params = {
+        **location,
+        'appid': api_key,
+        'units': 'metric'
+    }
+    try:
+        response = await _get(upstream.openweather_url(path), params)
+        data = jsonutil.loads(response.content)
+        if response.status_code == 200:
+            return { 'ok': True, 'data': shape(data) if shape else data }
+        message = data.get('message', unavailable) if isinstance(data, dict) else unavailable
+        return { 'ok': False, 'error': f"{response.status_code}: {message}" }
+    except upstream.CircuitOpenError:
+        return { 'ok': False, 'error': UPSTREAM_UNAVAILABLE, 'unavailable': True }
+    except httpx.TimeoutException:
+        return { 'ok': False, 'error': timed_out }
+    except Exception:
+        return { 'ok': False, 'error': unexpected }
+
+
+async def _geocode(api_key, city):
+    params = {
+        'q': ' '.join(city.split()),
+        'limit': 1,
+        'appid': api_key
+    }
+    try:
+        response = await _get(upstream.openweather_url('geo/1.0/direct'), params)
+        data = jsonutil.loads(response.content)
+        if response.status_code == 200 and isinstance(data, list):
+            return { 'ok': True, 'data': place(data[0]['lat'], data[0]['lon'], data[0].get('country', '')) if data else None }
+        return { 'ok': False }
+    except Exception:
+        return { 'ok': False }
+
+
+async def _cache_call(cache, method, *args):
+    # SQLite calls can wait on the file lock (up to its 5 s timeout); run them off the loop
+    if isinstance(cache, SQLiteCache):
+        return await asyncio.get_running_loop().run_in_executor(None, getattr(cache, method), *args)
+    return getattr(cache, method)(*args)
+
+
+async def _fetch_and_store(cache, key, fetch):
+    result = await fetch()
+    if result.get('ok'):
+        # Stamped like the Flask app's entries, since the two can share a cache
+        await _cache_call(cache, 'set', key, stamp_entry(result, cache.ttl))
+    return result
+
+
+async def _single_flight(key, factory):
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(factory())
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    # shield() so one caller timing out does not cancel the shared fetch
+    return await asyncio.shield(task)
+
+
+async def _refresh_entry(cache, key, fetch):
+    try:
+        await _single_flight(key, lambda: _fetch_and_store(cache, key, fetch))
+    finally:
+        await _cache_call(cache, 'end_refresh', key)
+
+
+async def _cached_fetch(cache, key, fetch):
+    value, state = await _cache_call(cache, 'get', key)
+    if state == 'fresh':
+        return value
+    if state == 'stale':
+        if await _cache_call(cache, 'begin_refresh', key):
+            task = asyncio.ensure_future(_refresh_entry(cache, key, fetch))
+            _background.add(task)
+            task.add_done_callback(_background.discard)
+        return value
+    try:
+        result = await asyncio.wait_for(
+            _single_flight(key, lambda: _fetch_and_store(cache, key, fetch)), UPSTREAM_WAIT_TIMEOUT)
+    except asyncio.TimeoutError:
+        return { 'ok': False, 'error': 'Request timed out. Please try again.' }
+    if result.get('unavailable'):
+        last_good = await _cache_call(cache, 'last_good', key)
+        if last_good is not None:
+            return dict(last_good, stale=True)
+    return result
+
+
+async def resolve_city(api_key, city):
+    # Same resolution as app.resolve_city, with the geocoding call made asynchronously
+    query = parse_city(city)
+    found, ambiguous = get_city_index().lookup(*query)
+    if found is not None and not ambiguous:
+        return found, None
+    key = ('geocode',) + query
+    if GEOCODE_FAILURE_TTL and (await _cache_call(geocode_failures, 'get', key))[1] == 'fresh':
+        return found, None
+    g = await _cached_fetch(geocode_cache, key, lambda: _geocode(api_key, city))
+    if g.get('ok'):
+        if g.get('data') is not None:
+            return g['data'], None
+        if found is None:
+            return None, CITY_NOT_FOUND
+    elif GEOCODE_FAILURE_TTL:
+        await _cache_call(geocode_failures, 'set', key, True)
+    return found, None
+
+
+async def _location(api_key, city):
+    found, error = await resolve_city(api_key, city)
+    if error:
+        return None, None, error
+    if found is None:
+        key, location = ('q',) + parse_city(city), { 'q': city }
+    else:
+        key, location = (found['lat'], found['lon']), { 'lat': found['lat'], 'lon': found['lon'] }
+    prewarmer.touch(key, (api_key, location))
+    return key, location, None
+
+
+async def get_weather(api_key, city):
+    key, location, error = await _location(api_key, city)
+    if error:
+        return { 'ok': False, 'error': error }
+    return await _cached_fetch(weather_cache, ('weather',) + key, lambda: _fetch(
+        'data/2.5/weather', api_key, location, 'Unable to fetch weather data',
+        'Request timed out. Please try again.', 'Unexpected error fetching weather data.'))
+
+
+async def get_forecast(api_key, city):
+    key, location, error = await _location(api_key, city)
+    if error:
+        return { 'ok': False, 'error': error }
+    return await _cached_fetch(forecast_cache, ('forecast',) + key, lambda: _fetch(
+        'data/2.5/forecast', api_key, location, 'Unable to fetch forecast',
+        'Forecast request timed out.', 'Unexpected error fetching forecast.', compact_forecast))
+
+
+class Cached:
+    """A 200 built from cached upstream ``results``, sent with app.cached_response's validators.
+
+    ``build`` is only called when the client's If-None-Match does not match.
+    """
+    __slots__ = ('build', 'validators')
+
+    def __init__(self, results, variant, build, max_age=None):
+        self.build = build
+        self.validators = validators(results, variant, max_age)
+
+
+def _api_key():
+    return os.environ.get('OPENWEATHER_API_KEY') or getattr(var, 'key', '')
+
+
+def _arg(args, name):
+    values = args.get(name)
+    return values[0] if values else None
+
+
+def _float_arg(args, name):
+    # Mirrors request.args.get(name, type=float): invalid values read as missing
+    try:
+        return float(_arg(args, name))
+    except (TypeError, ValueError):
+        return None
+
+
+async def api_weather(args):
+    city = (_arg(args, 'city') or '').strip()
+    if not city:
+        return { 'ok': False, 'error': 'City is required' }, 400
+    api_key = _api_key()
+    if not api_key:
+        return { 'ok': False, 'error': 'API key is not configured' }, 500
+    w = await get_weather(api_key, city)
+    if w.get('ok'):
+        fields = [f.strip() for f in (_arg(args, 'fields') or '').split(',') if f.strip()]
+
+        def build():
+            data = jsonutil.project(w.get('data'), fields) if fields else w.get('data')
+            payload = { 'ok': True, 'data': data }
+            if w.get('stale'):
+                payload['stale'] = True
+            return payload
+        return Cached([w], (fields, bool(w.get('stale'))), build)
+    return { 'ok': False, 'error': w.get('error') }, 502
+
+
+async def api_dashboard(args):
+    city = (_arg(args, 'city') or '').strip()
+    crop = (_arg(args, 'crop') or '').strip()
+    if not city:
+        return { 'ok': False, 'error': 'City is required' }, 400
+    api_key = _api_key()
+    if not api_key:
+        return { 'ok': False, 'error': 'API key is not configured' }, 500
+    w, f = await asyncio.gather(get_weather(api_key, city), get_forecast(api_key, city))
+    if not w.get('ok'):
+        return _dashboard_payload(city, crop, w, f)
+    variant = (city, crop, bool(w.get('stale') or f.get('stale')))
+    return Cached([w, f], variant, lambda: _dashboard_payload(city, crop, w, f)[0])
+
+
+async def agriculture_recommendation(args):
+    crop = (_arg(args, 'crop') or '').strip()
+    temperature = _float_arg(args, 'temperature')
+    humidity = _float_arg(args, 'humidity')
+    rainfall = _float_arg(args, 'rainfall')
+    city = (_arg(args, 'city') or '').strip()
+
+    if not crop or temperature is None or humidity is None:
+        return { 'error': 'Missing required parameters: crop, temperature, humidity' }, 400
+
+    used_rainfall = rainfall if rainfall is not None else 0.0
+    sources = []
+    if (rainfall is None or rainfall == 0.0) and city:
+        api_key = _api_key()
+        if api_key:
+            f = await get_forecast(api_key, city)
+            if f.get('ok'):
+                sources.append(f)
+                av = _forecast_averages(f, DEFAULT_HORIZON_HOURS)
+                if av.get('avgRainfall') is not None:
+                    used_rainfall = float(av.get('avgRainfall'))
+
+    def build():
+        result = build_agriculture_recommendation(crop, temperature, humidity, used_rainfall)
+        result['usedRainfall'] = used_rainfall
+        return result
+    return Cached(sources, (crop, temperature, humidity, used_rainfall), build, max_age=weather_cache.ttl)
+
+
+async def crop_recommendations(args):
+    city = (_arg(args, 'city') or '').strip()
+    api_key = _api_key()
+    if not city:
+        return { 'error': 'City is required' }, 400
+    hours = parse_horizon(_arg(args, 'horizon'))
+    if hours is None:
+        return { 'error': HORIZON_ERROR }, 400
+    window = (_arg(args, 'window') or '').strip().lower()
+    if window not in ('', 'day'):
+        return { 'error': "window must be 'day'" }, 400
+    if not api_key:
+        return { 'error': 'API key is not configured' }, 500
+    f = await get_forecast(api_key, city)
+    if not f.get('ok'):
+        return { 'error': f.get('error', 'Failed to fetch forecast') }, 502
+    return Cached([f], (city, hours, window), lambda: _crop_recommendations_from(f, city, hours, daily=window == 'day'))
+
+
+async def agriculture_recommendations_batch(body):
+    # Vectorized, but a large batch is still CPU work: keep it off the event loop
+    return await asyncio.get_running_loop().run_in_executor(None, recommendations_batch, body)
+
+
+async def crop_recommendations_batch(body):
+    cities, hours, deadline, error = parse_crop_batch(body)
+    if error:
+        return error
+    api_key = _api_key()
+    if not api_key:
+        return { 'error': 'API key is not configured' }, 500
+
+    tasks = [asyncio.ensure_future(get_forecast(api_key, city)) for city in cities]
+    done, pending = await asyncio.wait(tasks, timeout=deadline)
+    results = []
+    for city, task in zip(cities, tasks):
+        if task in done:
+            try:
+                results.append(_crop_recommendations_from(task.result(), city, hours))
+            except Exception:
+                results.append({ 'city': city, 'error': 'Unexpected error fetching forecast.' })
+        else:
+            # Left running so the fetch still warms the cache
+            _background.add(task)
+            task.add_done_callback(_background.discard)
+            results.append({ 'city': city, 'error': DEADLINE_EXCEEDED })
+    return { 'results': results, 'complete': not pending }, 200
+
+
+async def healthz(args):
+    return { 'ok': True }, 200
+
+
+async def readyz(args):
+    return readiness(_requests_in_flight - 1)
+
+
+ROUTES = {
+    '/healthz': healthz,
+    '/readyz': readyz,
+    '/api/weather': api_weather,
+    '/api/dashboard': api_dashboard,
+    '/agriculture/recommendation': agriculture_recommendation,
+    '/agriculture/crop-recommendations': crop_recommendations,
+}
+
+# POST routes, called with the decoded JSON body (None when it is not valid JSON)
+POST_ROUTES = {
+    '/agriculture/recommendations:batch': agriculture_recommendations_batch,
+    '/agriculture/crop-recommendations:batch': crop_recommendations_batch,
+}
+
+CORS_HEADERS = [
+    (b'access-control-allow-origin', b'*'),
+    (b'access-control-allow-headers', b'Content-Type,Authorization'),
+    (b'access-control-allow-methods', b'GET,POST,PUT,DELETE,OPTIONS'),
+]
+
+
+async def _send_json(send, payload, status, accept_encoding=None, cache_validators=None):
+    # Same encoding and validators as app.json_response / app.cached_response
+    if status == 304:
+        body = b''
+        headers = []
+    else:
+        body = jsonutil.dumps(payload)
+        headers = [(b'content-type', b'application/json')]
+    if status == 200 and compression.should_compress('application/json', len(body)):
+        headers.append((b'vary', b'Accept-Encoding'))
+        encoding = compression.negotiate(accept_encoding)
+        if encoding is not None:
+            body = compression.compress(body, encoding)
+            headers.append((b'content-encoding', encoding.encode()))
+    if cache_validators is not None:
+        etag, max_age = cache_validators
+        headers.append((b'etag', quote_etag(etag, weak=True).encode()))
+        headers.append((b'cache-control', f'public, max-age={max_age}'.encode()))
+    headers.append((b'content-length', str(len(body)).encode()))
+    breakers = upstream.breaker_states()
+    if breakers:
+        headers.append((b'x-upstream-breakers', ', '.join(f'{name}={state}' for name, state in breakers.items()).encode()))
+    await send({ 'type': 'http.response.start', 'status': status, 'headers': headers + CORS_HEADERS })
+    await send({ 'type': 'http.response.body', 'body': body })
+
+
+async def _json_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            break
+    try:
+        return jsonutil.loads(b''.join(chunks))
+    except ValueError:
+        return None
+
+
+async def _lifespan(receive, send):
+    global _client
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({ 'type': 'lifespan.startup.complete' })
+        elif message['type'] == 'lifespan.shutdown':
+            if _client is not None:
+                await _client.aclose()
+                _client = None
+            await send({ 'type': 'lifespan.shutdown.complete' })
+            return
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await _lifespan(receive, send)
+    if scope['type'] != 'http':
+        return
+
+    path = scope['path']
+    route = ROUTES.get(path) or POST_ROUTES.get(path)
+    if route is None:
+        return await _send_json(send, { 'error': 'Not found' }, 404)
+    methods = ('POST',) if path in POST_ROUTES else ('GET', 'HEAD')
+    if scope['method'] == 'OPTIONS':
+        headers = [(b'allow', ', '.join(methods + ('OPTIONS',)).encode()), (b'content-length', b'0'),
+                   (b'access-control-max-age', str(CORS_MAX_AGE).encode())]
+        await send({ 'type': 'http.response.start', 'status': 200, 'headers': headers + CORS_HEADERS })
+        await send({ 'type': 'http.response.body', 'body': b'' })
+        return
+    if scope['method'] not in methods:
+        return await _send_json(send, { 'error': 'Method not allowed' }, 405)
+
+    global _requests_in_flight
+    if path in POST_ROUTES:
+        arg = await _json_body(receive)
+    else:
+        arg = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    _requests_in_flight += 1
+    try:
+        result = await route(arg)
+    finally:
+        _requests_in_flight -= 1
+    headers = { name: value.decode('latin-1') for name, value in scope['headers'] if name in (b'accept-encoding', b'if-none-match') }
+    cache_validators = None
+    if isinstance(result, Cached):
+        cache_validators = result.validators
+        if cache_validators is not None and parse_etags(headers.get(b'if-none-match')).contains_weak(cache_validators[0]):
+            return await _send_json(send, None, 304, cache_validators=cache_validators)
+        result = result.build(), 200
+    payload, status = result
+    await _send_json(send, payload, status, headers.get(b'accept-encoding'), cache_validators)
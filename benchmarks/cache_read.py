@@ -0,0 +1,80 @@
+"""
+Read latency of the in-process TTLCache vs the shared SQLite cache.
+
+    python benchmarks/cache_read.py [--entries 512] [--reads 20000]
+
+Fills both caches with realistic weather payloads and times random fresh hits,
+including the cross-process path where the per-process memo is cold.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache import TTLCache  # noqa: E402
+from shared_cache import SQLiteCache  # noqa: E402
+
+WEATHER = {
+    'ok': True,
+    'data': {
+        'coord': { 'lon': 73.8553, 'lat': 18.5196 },
+        'weather': [{ 'id': 802, 'main': 'Clouds', 'description': 'scattered clouds', 'icon': '03d' }],
+        'main': { 'temp': 29.12, 'feels_like': 29.56, 'temp_min': 29.12, 'temp_max': 29.12, 'pressure': 1011, 'humidity': 48 },
+        'visibility': 10000,
+        'wind': { 'speed': 4.12, 'deg': 282 },
+        'clouds': { 'all': 40 },
+        'dt': 1729236000,
+        'sys': { 'country': 'IN', 'sunrise': 1729213361, 'sunset': 1729255638 },
+        'timezone': 19800,
+        'id': 1259229,
+        'name': 'Pune',
+        'cod': 200,
+    },
+}
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))] * 1e6
+    return f'p50 {pick(0.5):6.1f} us   p99 {pick(0.99):6.1f} us'
+
+
+def time_reads(cache, keys, reads=None):
+    # reads=None reads every key once, in order
+    samples = []
+    for key in (keys if reads is None else (random.choice(keys) for _ in range(reads))):
+        start = time.perf_counter()
+        cache.get(key)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--entries', type=int, default=512)
+    parser.add_argument('--reads', type=int, default=20000)
+    args = parser.parse_args()
+
+    keys = [('weather', 18 + i / 1000, 73 + i / 1000) for i in range(args.entries)]
+    path = os.path.join(tempfile.mkdtemp(), 'bench.sqlite3')
+
+    memory = TTLCache(args.entries, 600)
+    shared = SQLiteCache(path, 'weather', args.entries, 600)
+    for key in keys:
+        memory.set(key, WEATHER)
+        shared.set(key, WEATHER)
+
+    print(f'{args.entries} entries, {args.reads} random fresh reads')
+    print(f'  in-process TTLCache          {percentiles(time_reads(memory, keys, args.reads))}')
+    # First pass deserializes every entry; the memo then serves unchanged versions
+    cold = SQLiteCache(path, 'weather', args.entries, 600)
+    print(f'  SQLite, cold memo (1st read) {percentiles(time_reads(cold, keys))}')
+    print(f'  SQLite, warm memo            {percentiles(time_reads(shared, keys, args.reads))}')
+
+
+if __name__ == '__main__':
+    main()
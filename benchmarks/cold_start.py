@@ -0,0 +1,172 @@
+"""
+Cold-start cost of the Netlify handlers: import time vs first and warm invocations.
+
+    python benchmarks/cold_start.py [--runs 5] [--warm 50] [--latency 50] [--mode both]
+
+Every run loads a handler in a fresh interpreter under ``-X importtime`` against
+a local stub OpenWeather (OPENWEATHER_BASE_URL), then times the import, the first
+invocation and ``--warm`` further invocations. Medians over ``--runs`` are
+reported with the heaviest imports by package. ``--mode both`` runs the default
+lazy handlers and EAGER_INIT=1 side by side and prints the cold-start delta.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FUNCTIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'netlify', 'functions')
+
+# (label, module, event)
+CASES = [
+    ('api /api/weather', 'api', { 'path': '/api/weather', 'queryStringParameters': { 'city': 'Pune' } }),
+    ('api /api/dashboard', 'api', { 'path': '/api/dashboard', 'queryStringParameters': { 'city': 'Pune', 'crop': 'Rice' } }),
+    ('api /agriculture/recommendation', 'api', {
+        'path': '/agriculture/recommendation',
+        'queryStringParameters': { 'crop': 'Rice', 'temperature': '29', 'humidity': '70', 'rainfall': '4' },
+    }),
+    ('api /agriculture/crop-recommendations', 'api', {
+        'path': '/agriculture/crop-recommendations', 'queryStringParameters': { 'city': 'Pune' },
+    }),
+    ('weather (legacy URL)', 'weather', { 'path': '/.netlify/functions/weather', 'queryStringParameters': { 'city': 'Pune' } }),
+]
+
+WEATHER = {
+    'coord': { 'lon': 73.8553, 'lat': 18.5196 },
+    'weather': [{ 'id': 802, 'main': 'Clouds', 'description': 'scattered clouds', 'icon': '03d' }],
+    'main': { 'temp': 29.12, 'feels_like': 29.56, 'pressure': 1011, 'humidity': 48 },
+    'wind': { 'speed': 4.12, 'deg': 282 },
+    'dt': 1729236000,
+    'sys': { 'country': 'IN' },
+    'name': 'Pune',
+}
+FORECAST = {
+    'city': { 'name': 'Pune', 'country': 'IN', 'timezone': 19800 },
+    'list': [
+        { 'dt': 1729238400 + i * 10800, 'main': { 'temp': 24 + i % 8, 'humidity': 55 + i % 20 }, 'rain': { '3h': 0.4 * (i % 3) } }
+        for i in range(40)
+    ],
+}
+
+# Runs in the fresh interpreter; prints one JSON line with the timings
+CHILD = """
+import importlib, json, sys, time
+before = sorted(sys.modules)
+module, event, warm = sys.argv[1], json.loads(sys.argv[2]), int(sys.argv[3])
+t0 = time.perf_counter()
+handler = importlib.import_module(module).handler
+t1 = time.perf_counter()
+status = handler(event, None)['statusCode']
+t2 = time.perf_counter()
+times = []
+for _ in range(warm):
+    start = time.perf_counter()
+    handler(event, None)
+    times.append(time.perf_counter() - start)
+print(json.dumps({ 'before': before, 'status': status, 'import': t1 - t0, 'first': t2 - t1, 'warm': times }))
+"""
+
+
+def start_stub(latency):
+    bodies = {
+        '/data/2.5/weather': json.dumps(WEATHER).encode(),
+        '/data/2.5/forecast': json.dumps(FORECAST).encode(),
+    }
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            body = bodies.get(self.path.split('?')[0])
+            time.sleep(latency)
+            self.send_response(200 if body else 404)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body or b'')))
+            self.end_headers()
+            self.wfile.write(body or b'')
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def parse_importtime(stderr, skip):
+    """Self time (seconds) per top-level package, for modules imported after startup."""
+    by_package = defaultdict(float)
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        name = name.strip()
+        if name in skip:
+            continue
+        by_package[name.split('.')[0]] += int(self_us) / 1e6
+    return by_package
+
+
+def run_once(module, event, warm, base_url, eager):
+    env = dict(os.environ, OPENWEATHER_BASE_URL=base_url, OPENWEATHER_API_KEY='bench', EAGER_INIT='1' if eager else '0')
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', CHILD, module, json.dumps(event), str(warm)],
+        cwd=FUNCTIONS_DIR, env=env, capture_output=True, text=True, check=True)
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result['imports'] = parse_importtime(proc.stderr, set(result.pop('before')))
+    return result
+
+
+def measure(module, event, runs, warm, base_url, eager):
+    samples = [run_once(module, event, warm, base_url, eager) for _ in range(runs)]
+    warm_times = sorted(t for s in samples for t in s['warm'])
+    packages = defaultdict(list)
+    for s in samples:
+        for name, seconds in s['imports'].items():
+            packages[name].append(seconds)
+    return {
+        'status': samples[0]['status'],
+        'import': statistics.median(s['import'] for s in samples),
+        'first': statistics.median(s['first'] for s in samples),
+        'cold': statistics.median(s['import'] + s['first'] for s in samples),
+        'warmP50': warm_times[len(warm_times) // 2] if warm_times else None,
+        'warmP99': warm_times[int(len(warm_times) * 0.99)] if warm_times else None,
+        'topImports': sorted(((name, statistics.median(v)) for name, v in packages.items()), key=lambda item: -item[1])[:5],
+    }
+
+
+def ms(seconds):
+    return '-' if seconds is None else f'{seconds * 1000:.1f}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help='fresh interpreters per case')
+    parser.add_argument('--warm', type=int, default=50, help='warm invocations per run')
+    parser.add_argument('--latency', type=float, default=50, help='stub upstream latency in ms')
+    parser.add_argument('--mode', choices=('lazy', 'eager', 'both'), default='both')
+    args = parser.parse_args()
+
+    server = start_stub(args.latency / 1000)
+    base_url = f'http://127.0.0.1:{server.server_address[1]}'
+    modes = ['lazy', 'eager'] if args.mode == 'both' else [args.mode]
+    print(f'{"case":40} {"mode":6} {"status":>6} {"import":>8} {"first":>8} {"cold":>8} {"warm p50":>9} {"warm p99":>9}  (ms)')
+    for label, module, event in CASES:
+        results = {}
+        for mode in modes:
+            r = results[mode] = measure(module, event, args.runs, args.warm, base_url, mode == 'eager')
+            print(f'{label:40} {mode:6} {r["status"]:>6} {ms(r["import"]):>8} {ms(r["first"]):>8} {ms(r["cold"]):>8} '
+                  f'{ms(r["warmP50"]):>9} {ms(r["warmP99"]):>9}')
+            print(f'{"":40}   heaviest imports: ' + ', '.join(f'{name} {ms(s)}' for name, s in r['topImports']))
+        if len(results) == 2:
+            print(f'{"":40}   lazy cold start is {ms(results["eager"]["cold"] - results["lazy"]["cold"])} ms faster')
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,311 @@
+"""
+Micro-benchmarks for the recommendation and aggregation hot paths.
+
+    python benchmarks/hot_paths.py run [--output results.json] [--filter recommendation/]
+    python benchmarks/hot_paths.py compare baseline.json results.json [--threshold 10]
+
+``run`` times, per call:
+- build_agriculture_recommendation for each of the 19 crops (and an unknown
+  one) over inputs just below, at and just above every threshold its rules use
+- average_conditions_from_forecast on 40-slot OpenWeather forecast payloads
+  (monsoon, winter and pre-monsoon heat shapes, generated with a fixed seed)
+- recommend_crops_from_averages over typical and missing averages
+- every Netlify handler, warm, against a local stub OpenWeather
+
+Cases are timed round-robin over ``--passes`` passes of ``--repeat`` rounds of
+~20 ms each, and the best round is reported, as timeit recommends. ``compare``
+flags cases whose time grew by more than ``--threshold`` percent and exits 1
+if any did. Compare runs from the same, otherwise idle machine.
+"""
+import argparse
+import datetime
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import timeit
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+FUNCTIONS_DIR = os.path.join(ROOT, 'netlify', 'functions')
+
+# Mid-range values for the variables a case does not probe
+TYPICAL = { 't': 25.0, 'h': 65.0, 'r': 5.0 }
+EDGE_STEP = 0.01
+
+# (label, module, event); timed warm, after a first call fills the handler's caches
+HANDLER_CASES = [
+    ('api /api/weather', 'api', { 'path': '/api/weather', 'queryStringParameters': { 'city': 'Pune' } }),
+    ('api /api/forecast', 'api', { 'path': '/api/forecast', 'queryStringParameters': { 'city': 'Pune' } }),
+    ('api /api/dashboard', 'api', { 'path': '/api/dashboard', 'queryStringParameters': { 'city': 'Pune', 'crop': 'Rice' } }),
+    ('api /agriculture/recommendation', 'api', {
+        'path': '/agriculture/recommendation',
+        'queryStringParameters': { 'crop': 'Rice', 'temperature': '29', 'humidity': '70', 'rainfall': '4' },
+    }),
+    ('api /agriculture/crop-recommendations', 'api', {
+        'path': '/agriculture/crop-recommendations', 'queryStringParameters': { 'city': 'Pune' },
+    }),
+    ('weather', 'weather', { 'path': '/.netlify/functions/weather', 'queryStringParameters': { 'city': 'Pune' } }),
+    ('forecast', 'forecast', { 'path': '/.netlify/functions/forecast', 'queryStringParameters': { 'city': 'Pune' } }),
+    ('agriculture-recommendation', 'agriculture-recommendation', {
+        'path': '/.netlify/functions/agriculture-recommendation',
+        'queryStringParameters': { 'crop': 'Wheat', 'temperature': '18', 'humidity': '55', 'rainfall': '0' },
+    }),
+    ('crop-recommendations', 'crop-recommendations', {
+        'path': '/.netlify/functions/crop-recommendations', 'queryStringParameters': { 'city': 'Pune' },
+    }),
+]
+
+AVERAGES = {
+    'monsoon': (27.4, 84.0, 9.6),
+    'winter': (16.2, 52.0, 0.0),
+    'pre-monsoon heat': (38.5, 28.0, 0.0),
+    'missing': (None, None, None),
+}
+
+
+def forecast_payload(name, base_temp, swing, humidity, rain_chance, seed):
+    """A 40-slot /data/2.5/forecast payload with every field OpenWeather sends."""
+    rng = random.Random(seed)
+    start = 1729238400
+    slots = []
+    for i in range(40):
+        hour = (i * 3 + 5) % 24
+        temp = round(base_temp + swing * (0.5 - abs(hour - 14) / 24) + rng.uniform(-1, 1), 2)
+        raining = rng.random() < rain_chance
+        slot = {
+            'dt': start + i * 10800,
+            'main': {
+                'temp': temp, 'feels_like': round(temp + rng.uniform(-1, 2), 2),
+                'temp_min': round(temp - 0.4, 2), 'temp_max': round(temp + 0.4, 2),
+                'pressure': 1008 + rng.randint(0, 6), 'sea_level': 1008, 'grnd_level': 948,
+                'humidity': max(5, min(100, int(humidity + rng.uniform(-8, 8)))), 'temp_kf': 0,
+            },
+            'weather': [
+                { 'id': 500, 'main': 'Rain', 'description': 'light rain', 'icon': '10d' } if raining
+                else { 'id': 802, 'main': 'Clouds', 'description': 'scattered clouds', 'icon': '03d' }
+            ],
+            'clouds': { 'all': rng.randint(20, 100) if raining else rng.randint(0, 40) },
+            'wind': { 'speed': round(rng.uniform(1, 6), 2), 'deg': rng.randint(0, 359), 'gust': round(rng.uniform(2, 9), 2) },
+            'visibility': 10000,
+            'pop': round(rng.uniform(0.4, 1), 2) if raining else 0,
+            'sys': { 'pod': 'd' if 6 <= hour < 18 else 'n' },
+            'dt_txt': datetime.datetime.fromtimestamp(start + i * 10800, datetime.timezone.utc).strftime('%Y-%m-%d %H:%M:%S'),
+        }
+        if raining:
+            slot['rain'] = { '3h': round(rng.uniform(0.1, 6), 2) }
+        slots.append(slot)
+    return {
+        'cod': '200', 'message': 0, 'cnt': 40, 'list': slots,
+        'city': {
+            'id': 1259229, 'name': name, 'coord': { 'lat': 18.5196, 'lon': 73.8553 }, 'country': 'IN',
+            'population': 9999, 'timezone': 19800, 'sunrise': 1729213361, 'sunset': 1729255638,
+        },
+    }
+
+
+FORECASTS = {
+    'monsoon': forecast_payload('Pune', 26, 6, 85, 0.6, 1),
+    'winter': forecast_payload('Ludhiana', 15, 12, 55, 0.05, 2),
+    'pre-monsoon heat': forecast_payload('Jaipur', 37, 10, 25, 0.0, 3),
+}
+
+
+def edge_inputs(agriculture, crop):
+    """(t, h, r) rows just below, at and just above every threshold the crop's rules test."""
+    tables = [
+        agriculture.CROP_RULES.get(crop, []), agriculture.ALERT_RULES, agriculture.IRRIGATION_RULES,
+        agriculture.FERTILIZER_RULES, agriculture.POST_HARVEST_RULES,
+        agriculture._for_crop(agriculture.SOWING_WINDOW_RULES, crop), agriculture._for_crop(agriculture.PEST_DISEASE_RULES, crop),
+    ]
+    thresholds = set()
+    for rules in tables:
+        for conditions, _ in rules:
+            for clause in conditions:
+                for value in clause[2:]:
+                    thresholds.add((clause[0], float(value)))
+    rows = []
+    for var, value in sorted(thresholds):
+        for edge in (value - EDGE_STEP, value, value + EDGE_STEP):
+            row = dict(TYPICAL, **{ var: edge })
+            rows.append((row['t'], row['h'], row['r']))
+    return rows
+
+
+def measure(cases, repeat, passes):
+    """``{name: result}`` with the best time per call (``us``) of each ``fn(*args)`` over its args_list.
+
+    Cases are timed round-robin for ``passes`` passes of ``repeat`` short rounds
+    each, so a slow patch on a shared host does not land on one case only.
+    """
+    timers = []
+    for name, fn, args_list, extra in cases:
+        def body(fn=fn, args_list=args_list):
+            for args in args_list:
+                fn(*args)
+        timer = timeit.Timer(body)
+        number, _ = timer.autorange()
+        timers.append((name, timer, max(1, number // 10), len(args_list), extra))
+    best = {}
+    for _ in range(passes):
+        for name, timer, number, inputs, _ in timers:
+            seconds = min(timer.repeat(repeat, number)) / (number * inputs)
+            best[name] = min(best.get(name, seconds), seconds)
+    return {
+        name: dict(extra, us=best[name] * 1e6, calls=number * inputs * repeat * passes, inputs=inputs)
+        for name, _, number, inputs, extra in timers
+    }
+
+
+def python_cases(filter_):
+    sys.path.insert(0, ROOT)
+    import agriculture
+
+    cases = []
+    for crop in list(agriculture.CROP_RULES) + ['Quinoa']:
+        rows = [(crop,) + row for row in edge_inputs(agriculture, crop)]
+        label = crop if crop in agriculture.CROP_RULES else f'{crop} (unknown)'
+        cases.append((f'recommendation/{label}', agriculture.build_agriculture_recommendation, rows))
+    for name, payload in FORECASTS.items():
+        cases.append((f'averages/{name}', agriculture.average_conditions_from_forecast, [(payload,)]))
+    for name, averages in AVERAGES.items():
+        cases.append((f'crops/{name}', agriculture.recommend_crops_from_averages, [averages]))
+    selected = []
+    for name, fn, args_list in cases:
+        if filter_ in name:
+            fn(*args_list[0])  # compile evaluators, load the catalog
+            selected.append((name, fn, args_list, {}))
+    return selected
+
+
+def run_handlers(filter_, repeat, passes):
+    """Times the Netlify handlers in a fresh interpreter rooted at netlify/functions.
+
+    The functions directory carries its own copies of cache, upstream, catalog
+    etc., which must not mix with the top-level modules in this process.
+    """
+    if not any(filter_ in f'handler/{label}' for label, _, _ in HANDLER_CASES):
+        return {}
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '_handlers', '--repeat', str(repeat), '--passes', str(passes), '--filter', filter_],
+        cwd=FUNCTIONS_DIR, capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def handlers_child(filter_, repeat, passes):
+    import importlib
+    from cold_start import start_stub
+
+    server = start_stub(0)
+    os.environ['OPENWEATHER_BASE_URL'] = f'http://127.0.0.1:{server.server_address[1]}'
+    os.environ['OPENWEATHER_API_KEY'] = 'bench'
+    sys.path.insert(0, FUNCTIONS_DIR)
+    cases = []
+    for label, module, event in HANDLER_CASES:
+        name = f'handler/{label}'
+        if filter_ in name:
+            handler = importlib.import_module(module).handler
+            status = handler(event, None)['statusCode']
+            cases.append((name, handler, [(event, None)], { 'status': status }))
+    results = measure(cases, repeat, passes)
+    server.shutdown()
+    print(json.dumps(results))
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run(args):
+    results = measure(python_cases(args.filter), args.repeat, args.passes)
+    results.update(run_handlers(args.filter, args.repeat, args.passes))
+    for name, r in results.items():
+        print(f'{name:52} {r["us"]:10.2f} us/call')
+    report = {
+        'meta': {
+            'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+            'passes': args.passes,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f'wrote {args.output}')
+
+
+def _timing(result):
+    us = result.get('us') if isinstance(result, dict) else None
+    return us if isinstance(us, (int, float)) and not isinstance(us, bool) and math.isfinite(us) else None
+
+
+def _us(value):
+    return 'n/a' if value is None else f'{value:.2f}'
+
+
+def compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)['results']
+    with open(args.current) as f:
+        current = json.load(f)['results']
+    regressions = []
+    print(f'{"case":52} {"baseline":>10} {"current":>10} {"change":>8}  (us/call)')
+    for name in sorted(set(baseline) | set(current)):
+        if name not in baseline or name not in current:
+            print(f'{name:52} {"only in " + ("baseline" if name in baseline else "current"):>31}')
+            continue
+        before, after = _timing(baseline[name]), _timing(current[name])
+        if before is None or after is None or before <= 0:
+            # Missing, unmeasurable or zero timings: no ratio to report
+            print(f'{name:52} {_us(before):>10} {_us(after):>10} {"n/a":>8}')
+            continue
+        change = (after - before) / before * 100
+        flag = ''
+        if change > args.threshold:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        print(f'{name:52} {before:10.2f} {after:10.2f} {change:+7.1f}%{flag}')
+    if regressions:
+        print(f'{len(regressions)} case(s) slower by more than {args.threshold:g}%')
+        sys.exit(1)
+    print(f'no case slower by more than {args.threshold:g}%')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run', help='run the benchmarks')
+    run_parser.add_argument('--output', help='write results as JSON to this file')
+    run_parser.add_argument('--filter', default='', help='only cases whose name contains this')
+    run_parser.add_argument('--repeat', type=int, default=5, help='timing rounds per case and pass; the best is kept')
+    run_parser.add_argument('--passes', type=int, default=5, help='round-robin passes over all cases')
+    compare_parser = commands.add_parser('compare', help='compare two result files')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=10, help='percent slowdown reported as a regression')
+    child_parser = commands.add_parser('_handlers')
+    child_parser.add_argument('--filter', default='')
+    child_parser.add_argument('--repeat', type=int, default=5)
+    child_parser.add_argument('--passes', type=int, default=5)
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        run(args)
+    elif args.command == 'compare':
+        compare(args)
+    else:
+        handlers_child(args.filter, args.repeat, args.passes)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Per-request cost of the Prometheus instrumentation (metrics.py).
+
+    python benchmarks/metrics_overhead.py [--requests 20000] [--runs 5]
+
+Times the instrumentation a request goes through (one histogram observation and
+one counter increment, plus the perf_counter reads) in isolation, then serves
+``--requests`` GET /healthz through the Flask test client in fresh interpreters
+with METRICS_ENABLED=1 and =0 and reports the median per-request difference.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the fresh interpreter; prints the mean seconds per request
+CHILD = """
+import sys, time
+import app
+client = app.app.test_client()
+n = int(sys.argv[1])
+for _ in range(500):
+    client.get('/healthz')
+start = time.perf_counter()
+for _ in range(n):
+    client.get('/healthz')
+print((time.perf_counter() - start) / n)
+"""
+
+
+def isolated(n):
+    sys.path.insert(0, ROOT)
+    import metrics
+
+    registry = metrics.Registry(directory=os.devnull)
+    histogram = registry.histogram('bench_seconds', 'bench', ('route', 'method'))
+    counter = registry.counter('bench_total', 'bench', ('route', 'method', 'status'))
+    start = time.perf_counter()
+    for _ in range(n):
+        started = time.perf_counter()
+        histogram.observe(time.perf_counter() - started, '/api/weather', 'GET')
+        counter.inc('/api/weather', 'GET', 200)
+    return (time.perf_counter() - start) / n
+
+
+def per_request(n, enabled):
+    env = dict(os.environ, METRICS_ENABLED='1' if enabled else '0', OPENWEATHER_API_KEY='bench')
+    proc = subprocess.run([sys.executable, '-c', CHILD, str(n)], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    return float(proc.stdout.strip().splitlines()[-1])
+
+
+def us(seconds):
+    return f'{seconds * 1e6:.2f}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=20000, help='requests per run')
+    parser.add_argument('--runs', type=int, default=5, help='fresh interpreters per setting')
+    args = parser.parse_args()
+
+    print(f'instrumentation alone:   {us(statistics.median(isolated(args.requests) for _ in range(args.runs)))} us/request')
+    on = statistics.median(per_request(args.requests, True) for _ in range(args.runs))
+    off = statistics.median(per_request(args.requests, False) for _ in range(args.runs))
+    print(f'GET /healthz, metrics on:  {us(on)} us/request')
+    print(f'GET /healthz, metrics off: {us(off)} us/request')
+    print(f'overhead:                {us(on - off)} us/request')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+# Crop-suitability catalog loaded once from a data file into a columnar index.
+#
+# Each record is a climate band: name, t_min/t_max (°C), h_min/h_max (%) and r_min
+# (mm of rain over the forecast window). Rows are stored as NumPy columns sorted
+# by t_min, so a query binary-searches the rows whose band can contain the
+# temperature and checks the rest of the band with vectorized masks.
+import csv
+import json
+import os
+import threading
+
+import numpy as np
+
+DEFAULT_CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'crops.csv')
+CROP_CATALOG_PATH = os.environ.get('CROP_CATALOG_PATH', DEFAULT_CATALOG_PATH)
+
+_FIELDS = ('t_min', 't_max', 'h_min', 'h_max', 'r_min')
+
+
+def _read_records(path):
+    if path.endswith('.json'):
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+class CropCatalog:
+    def __init__(self, records):
+        names = [str(rec['name']) for rec in records]
+        columns = { field: np.array([float(rec[field]) for rec in records], dtype=np.float64) for field in _FIELDS }
+        # Stable sort keeps declaration order among equal t_min, which is also the tie-break order
+        order = np.argsort(columns['t_min'], kind='stable')
+        self.names = np.array(names, dtype=object)[order]
+        self.position = order
+        self.t_min = columns['t_min'][order]
+        self.t_max = columns['t_max'][order]
+        self.h_min = columns['h_min'][order]
+        self.h_max = columns['h_max'][order]
+        self.r_min = columns['r_min'][order]
+        self.t_mid = (self.t_min + self.t_max) / 2
+        self.h_mid = (self.h_min + self.h_max) / 2
+        # Zero-width bands score 1 at their single point instead of dividing by zero
+        self.t_half = np.maximum((self.t_max - self.t_min) / 2, 1e-9)
+        self.h_half = np.maximum((self.h_max - self.h_min) / 2, 1e-9)
+
+    @classmethod
+    def load(cls, path):
+        return cls(_read_records(path))
+
+    def __len__(self):
+        return len(self.names)
+
+    def recommend(self, avg_temp, avg_humidity, avg_rainfall, limit=10):
+        """Names of crops whose band contains the averages, best fit first.
+
+        The score is the mean of how close temperature and humidity sit to the
+        centre of each band (1 at the centre, 0 at the edge). Rainfall only
+        filters: it must reach r_min when known. Ties keep catalog order.
+        """
+        if avg_temp is None or avg_humidity is None:
+            return []
+        # Rows past this point have t_min > avg_temp and can never match
+        end = int(np.searchsorted(self.t_min, avg_temp, side='right'))
+        mask = (self.t_max[:end] >= avg_temp) & (self.h_min[:end] <= avg_humidity) & (self.h_max[:end] >= avg_humidity)
+        if avg_rainfall is not None:
+            mask &= self.r_min[:end] <= avg_rainfall
+        rows = np.flatnonzero(mask)
+        if len(rows) == 0:
+            return []
+        score = 1 - (np.abs(avg_temp - self.t_mid[rows]) / self.t_half[rows]
+                     + np.abs(avg_humidity - self.h_mid[rows]) / self.h_half[rows]) / 2
+        ranked = rows[np.lexsort((self.position[rows], -score))][:limit]
+        return self.names[ranked].tolist()
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog():
+    """The process-wide catalog, loaded from CROP_CATALOG_PATH on first use."""
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = CropCatalog.load(CROP_CATALOG_PATH)
+    return _catalog
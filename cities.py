@@ -0,0 +1,128 @@
+# Free-text city input -> canonical OpenWeather place (lat/lon).
+#
+# The local index is built from OpenWeather's bulk city list
+# (http://bulk.openweathermap.org/sample/city.list.json.gz, ~200k rows). Names are
+# normalized, sorted and packed into one string plus offset/coordinate arrays, so
+# the whole list costs a few MB and a lookup is a binary search. Inputs the index
+# cannot answer on its own are left to the geocoding API by the caller.
+import gzip
+import os
+import threading
+import unicodedata
+from array import array
+
+import jsonutil
+
+DEFAULT_CITY_LIST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'city.list.json.gz')
+CITY_LIST_PATH = os.environ.get('CITY_LIST_PATH', DEFAULT_CITY_LIST_PATH)
+
+# Same-name candidates further apart than this (degrees) are different places
+_SAME_PLACE_DEGREES = 0.25
+
+
+def normalize_name(text):
+    """Case-, accent- and whitespace-insensitive form of a place name."""
+    if not text.isascii():
+        text = unicodedata.normalize('NFKD', text)
+        text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return ' '.join(text.casefold().split())
+
+
+def parse_city(text):
+    """Split 'name[,state][,country]' input into normalized (name, state, country)."""
+    parts = [normalize_name(part) for part in (text or '').split(',')]
+    parts = [part for part in parts if part]
+    if not parts:
+        return '', '', ''
+    country = ''
+    if len(parts) > 1 and len(parts[-1]) == 2 and parts[-1].isalpha():
+        country = parts.pop().upper()
+    state = parts[1] if len(parts) > 1 else ''
+    return parts[0], state, country
+
+
+def place(lat, lon, country=''):
+    # Rounded like OpenWeather's own coordinates so equal places give equal cache keys
+    return { 'lat': round(float(lat), 4), 'lon': round(float(lon), 4), 'country': country }
+
+
+def _read_records(path):
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rb') as f:
+        return jsonutil.loads(f.read())
+
+
+class CityIndex:
+    def __init__(self, records):
+        rows = sorted(
+            (normalize_name(rec['name']), i, (rec.get('country') or '').upper()[:2], normalize_name(rec['state']) if rec.get('state') else '',
+             rec['coord']['lat'], rec['coord']['lon'])
+            for i, rec in enumerate(records) if rec.get('name')
+        )
+        offsets = array('I', [0])
+        for row in rows:
+            offsets.append(offsets[-1] + len(row[0]))
+        self._names = ''.join(row[0] for row in rows)
+        self._offsets = offsets
+        self._countries = ''.join(row[2].ljust(2) for row in rows)
+        # Only US rows carry a state, so a sparse dict beats a column
+        self._states = { i: row[3] for i, row in enumerate(rows) if row[3] }
+        self._lat = array('d', (row[4] for row in rows))
+        self._lon = array('d', (row[5] for row in rows))
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return cls([])
+        return cls(_read_records(path))
+
+    def __len__(self):
+        return len(self._lat)
+
+    def _name(self, i):
+        return self._names[self._offsets[i]:self._offsets[i + 1]]
+
+    def _bisect(self, name, right):
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            current = self._name(mid)
+            if current < name or (right and current == name):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def lookup(self, name, state='', country=''):
+        """``(place, ambiguous)`` for a parsed query; place is None when nothing matches.
+
+        ``ambiguous`` is True when the remaining candidates are far apart (e.g.
+        'Paris' without a country); the first row in list order is returned.
+        """
+        rows = range(self._bisect(name, False), self._bisect(name, True))
+        if country:
+            rows = [i for i in rows if self._countries[2 * i:2 * i + 2] == country]
+        if state:
+            rows = [i for i in rows if self._states.get(i) == state] or rows
+        if not rows:
+            return None, False
+        first = rows[0]
+        ambiguous = any(
+            abs(self._lat[i] - self._lat[first]) > _SAME_PLACE_DEGREES or abs(self._lon[i] - self._lon[first]) > _SAME_PLACE_DEGREES
+            for i in rows
+        )
+        return place(self._lat[first], self._lon[first], self._countries[2 * first:2 * first + 2].strip()), ambiguous
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_city_index():
+    """The process-wide index, loaded from CITY_LIST_PATH on first use (empty if the file is absent)."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = CityIndex.load(CITY_LIST_PATH)
+    return _index
@@ -0,0 +1,108 @@
+# Negotiated gzip/brotli response compression.
+#
+# Bodies under COMPRESS_MIN_SIZE bytes go out as-is: below roughly one TCP
+# segment compression saves no round trips. Compressed bodies are memoized by a
+# digest of the uncompressed bytes, so pages that render identically (the landing
+# page, a city's result page until the weather changes) and the static pages
+# precompressed at startup are compressed once, not per request. Brotli is used
+# when the `brotli` package is installed and the client accepts it.
+import gzip
+import hashlib
+import os
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from cache import ByteLRU
+
+COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+COMPRESS_GZIP_LEVEL = int(os.environ.get('COMPRESS_GZIP_LEVEL', 6))
+COMPRESS_BROTLI_LEVEL = int(os.environ.get('COMPRESS_BROTLI_LEVEL', 5))
+COMPRESS_CACHE_BYTES = int(os.environ.get('COMPRESS_CACHE_BYTES', 8 * 1024 * 1024))
+
+COMPRESSIBLE_TYPES = { 'application/json', 'text/html', 'text/css', 'text/plain', 'application/javascript', 'text/javascript' }
+
+# Preferred first when the client rates them equally
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def negotiate(accept_encoding):
+    """The best encoding we support for an Accept-Encoding header value, or None."""
+    qualities = {}
+    for part in (accept_encoding or '').split(','):
+        name, _, params = part.strip().partition(';')
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        qualities[name.strip().lower()] = q
+    best, best_q = None, 0.0
+    for encoding in ENCODINGS:
+        q = qualities.get(encoding, qualities.get('*', 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def _compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=COMPRESS_BROTLI_LEVEL)
+    # mtime=0 keeps the output identical for identical input
+    return gzip.compress(body, compresslevel=COMPRESS_GZIP_LEVEL, mtime=0)
+
+
+class CompressedBodies(ByteLRU):
+    """Compressed bodies keyed by (encoding, digest of the raw body), bounded by total bytes."""
+
+    def compress(self, body, encoding):
+        key = (encoding, hashlib.blake2b(body, digest_size=16).digest())
+        compressed = self.get(key)
+        if compressed is None:
+            compressed = _compress(body, encoding)
+            self.set(key, compressed)
+        return compressed
+
+
+compressed_bodies = CompressedBodies(COMPRESS_CACHE_BYTES)
+
+
+def compressible(content_type):
+    return (content_type or '').split(';')[0].strip() in COMPRESSIBLE_TYPES
+
+
+def should_compress(content_type, size):
+    return size >= COMPRESS_MIN_SIZE and compressible(content_type)
+
+
+def compress(body, encoding):
+    return compressed_bodies.compress(body, encoding)
+
+
+def precompress(body):
+    """Compress ``body`` in every supported encoding ahead of the first request."""
+    for encoding in ENCODINGS:
+        compress(body, encoding)
+
+
+def compress_stream(chunks, encoding):
+    """Compress an iterable of byte chunks, flushing after each one.
+
+    Every chunk reaches the client as soon as it is produced, at the cost of a
+    few bytes per flush; nothing is memoized.
+    """
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=COMPRESS_BROTLI_LEVEL)
+        for chunk in chunks:
+            yield compressor.process(chunk) + compressor.flush()
+        yield compressor.finish()
+        return
+    compressor = zlib.compressobj(COMPRESS_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
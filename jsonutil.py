@@ -0,0 +1,50 @@
+# JSON encode/decode for API responses and upstream payloads.
+#
+# Uses orjson when it is installed and falls back to the standard library.
+# Output is compact UTF-8 (no key sorting, no \u escapes), which is smaller on
+# the wire than jsonify's ASCII-escaped output for our em dashes and degree signs.
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(payload):
+    """Serialize ``payload`` to UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def loads(data):
+    """Parse JSON from bytes or str."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def project(data, fields):
+    """Keep only the dotted ``fields`` paths of ``data``, e.g. ['name', 'main.temp'].
+
+    Missing paths are skipped. A path through a list applies to every element.
+    """
+    if isinstance(data, list):
+        return [project(item, fields) for item in data]
+    if not isinstance(data, dict):
+        return data
+    out = {}
+    nested = {}
+    for field in fields:
+        head, _, rest = field.partition('.')
+        if head not in data:
+            continue
+        if rest:
+            nested.setdefault(head, []).append(rest)
+        else:
+            out[head] = data[head]
+    for head, rests in nested.items():
+        if head not in out:
+            out[head] = project(data[head], rests)
+    return out
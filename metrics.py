@@ -0,0 +1,340 @@
+# Prometheus metrics aggregated across gunicorn workers.
+#
+# Each worker counts in plain in-process structures (one dict update under a lock
+# per observation) and writes a JSON snapshot to METRICS_DIR every
+# METRICS_FLUSH_INTERVAL seconds and at exit. Snapshot files are named by pid and
+# a random id drawn when the process starts, so a worker that reuses a dead
+# worker's pid never overwrites its figures. /metrics, answered by whichever
+# worker gets the request, first folds the counters and histograms of exited
+# workers into retired.json and removes their snapshots, then sums that with its
+# own live values and every other worker's latest snapshot. Totals therefore
+# never go backwards; gauges only count live workers. The default directory is
+# keyed by the parent (gunicorn master) pid, so a restart starts from zero while
+# worker restarts under the same master do not.
+import atexit
+import math
+import operator
+import os
+import tempfile
+import threading
+import time
+import uuid
+from bisect import bisect_left
+
+try:
+    import fcntl
+except ImportError:
+    # Windows dev servers run a single process; there is nothing to fold concurrently
+    fcntl = None
+
+import jsonutil
+
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') != '0'
+METRICS_DIR = os.environ.get('METRICS_DIR') or os.path.join(tempfile.gettempdir(), f'agrocast-metrics-{os.getppid()}')
+METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 5))
+
+# Seconds; covers cache hits (sub-millisecond) up to upstream timeouts
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+RETIRED = 'retired.json'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _label_text(names, values):
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+def _number(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Counter:
+    kind = 'counter'
+    # How two workers' values for the same labels combine
+    combine = staticmethod(operator.add)
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            return { _label_text(self.labels, key): value for key, value in self._values.items() }
+
+
+class Collected(Counter):
+    """Values read from ``collect()`` (``{label values: value}``) at snapshot time.
+
+    For gauges such as requests in flight, and for counters already kept
+    elsewhere, such as cache hits. ``combine`` merges workers' values (default: sum).
+    """
+
+    def __init__(self, name, help, collect, labels=(), kind='gauge', combine=operator.add):
+        super().__init__(name, help, labels)
+        self.collect = collect
+        self.kind = kind
+        self.combine = combine
+
+    def snapshot(self):
+        return { _label_text(self.labels, key): value for key, value in self.collect().items() }
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self._values = {}  # label values -> [count per bucket..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(label_values)
+            if row is None:
+                row = self._values[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            row[i] += 1
+            row[-1] += value
+
+    def snapshot(self):
+        with self._lock:
+            return { _label_text(self.labels, key): list(row) for key, row in self._values.items() }
+
+
+class Registry:
+    def __init__(self, directory=METRICS_DIR, flush_interval=METRICS_FLUSH_INTERVAL):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.metrics = []
+        self._lock = threading.Lock()
+        self._flusher_pid = None
+        self._id = None
+        self._id_pid = None
+        self._started = None
+
+    def counter(self, name, help, labels=()):
+        return self._add(Counter(name, help, labels))
+
+    def gauge(self, name, help, collect, labels=(), combine=operator.add):
+        return self._add(Collected(name, help, collect, labels, combine=combine))
+
+    def collected_counter(self, name, help, collect, labels=()):
+        return self._add(Collected(name, help, collect, labels, kind='counter'))
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(name, help, labels, buckets))
+
+    def _add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def _process_id(self):
+        # Drawn again after a fork: every process gets its own snapshot file
+        if self._id_pid != os.getpid():
+            self._id = uuid.uuid4().hex
+            self._id_pid = os.getpid()
+            self._started = time.time()
+        return self._id
+
+    def snapshot(self):
+        return {
+            'pid': os.getpid(),
+            'id': self._process_id(),
+            'started': self._started,
+            'metrics': { metric.name: metric.snapshot() for metric in self.metrics },
+        }
+
+    def _path(self):
+        return os.path.join(self.directory, f'{os.getpid()}-{self._process_id()}.json')
+
+    def _write(self, name, value):
+        path = os.path.join(self.directory, name)
+        tmp = f'{path}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(jsonutil.dumps(value))
+        os.replace(tmp, path)
+
+    def flush(self):
+        """Write this process's snapshot where other workers' /metrics can read it."""
+        os.makedirs(self.directory, exist_ok=True)
+        self._write(os.path.basename(self._path()), self.snapshot())
+
+    def ensure_flushing(self):
+        # One flusher thread per process; forked workers start their own
+        if self._flusher_pid == os.getpid():
+            return
+        with self._lock:
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+            threading.Thread(target=self._flush_loop, name='metrics-flush', daemon=True).start()
+            atexit.register(self._flush_quietly)
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self._flush_quietly()
+
+    def _flush_quietly(self):
+        try:
+            self.flush()
+        except OSError:
+            pass
+
+    def _read(self, name):
+        try:
+            with open(os.path.join(self.directory, name), 'rb') as f:
+                return jsonutil.loads(f.read())
+        except (OSError, ValueError):
+            return None
+
+    def _other_snapshots(self):
+        """``{file name: snapshot}`` of every other process."""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return {}
+        own = os.path.basename(self._path())
+        snapshots = {}
+        for name in names:
+            if not name.endswith('.json') or name in (own, RETIRED):
+                continue
+            snapshot = self._read(name)
+            # Snapshots without an id predate per-process files and are ignored
+            if snapshot is not None and 'id' in snapshot:
+                snapshots[name] = snapshot
+        return snapshots
+
+    def _fold_exited(self, snapshots):
+        """Add exited processes' counters and histograms to retired.json and drop their snapshots.
+
+        A process has exited when its pid is gone or a later process reused it.
+        Call with the directory lock held. Returns the retired totals.
+        """
+        latest = {}
+        for s in snapshots.values():
+            if s['pid'] not in latest or s['started'] > latest[s['pid']]['started']:
+                latest[s['pid']] = s
+        exited = [name for name, s in snapshots.items()
+                  if s['pid'] == os.getpid() or not _alive(s['pid']) or latest[s['pid']] is not s]
+        retired = self._read(RETIRED) or { 'metrics': {}, 'folded': [] }
+        if not exited:
+            return retired
+        # Folded ids are written before the snapshots are removed, so a fold that dies in between is not repeated
+        folded = set(retired['folded'])
+        for name in exited:
+            s = snapshots.pop(name)
+            if s['id'] in folded:
+                continue
+            for metric in self.metrics:
+                if metric.kind != 'gauge':
+                    _merge(metric, retired['metrics'].setdefault(metric.name, {}), s['metrics'].get(metric.name, {}))
+            folded.add(s['id'])
+        retired['folded'] = sorted(folded)
+        self._write(RETIRED, retired)
+        for name in exited:
+            try:
+                os.unlink(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+        retired['folded'] = []
+        self._write(RETIRED, retired)
+        return retired
+
+    def _locked(self):
+        os.makedirs(self.directory, exist_ok=True)
+        f = open(os.path.join(self.directory, '.lock'), 'wb')
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        return f
+
+    def render(self):
+        """Prometheus text exposition of every worker's metrics, summed, including exited workers'."""
+        with self._locked():
+            snapshots = self._other_snapshots()
+            retired = self._fold_exited(snapshots)
+        live = [self.snapshot()] + list(snapshots.values())
+        lines = []
+        for metric in self.metrics:
+            merged = {}
+            if metric.kind != 'gauge':
+                _merge(metric, merged, retired['metrics'].get(metric.name, {}))
+            for s in live:
+                _merge(metric, merged, s['metrics'].get(metric.name, {}))
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for labels, value in sorted(merged.items()):
+                if metric.kind == 'histogram':
+                    lines.extend(_histogram_lines(metric, labels, value))
+                else:
+                    lines.append(f'{metric.name}{{{labels}}} {_number(value)}' if labels else f'{metric.name} {_number(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+def _merge(metric, merged, values):
+    """Add one snapshot's ``{labels: value}`` for ``metric`` into ``merged``."""
+    for labels, value in values.items():
+        if metric.kind == 'histogram':
+            row = merged.setdefault(labels, [0] * len(value))
+            merged[labels] = [a + b for a, b in zip(row, value)]
+        else:
+            merged[labels] = metric.combine(merged[labels], value) if labels in merged else value
+
+
+def _histogram_lines(metric, labels, row):
+    prefix = f'{labels},' if labels else ''
+    cumulative = 0
+    for bound, count in zip(metric.buckets + (math.inf,), row[:-1]):
+        cumulative += count
+        yield f'{metric.name}_bucket{{{prefix}le="{_number(bound)}"}} {cumulative}'
+    suffix = f'{{{labels}}}' if labels else ''
+    yield f'{metric.name}_sum{suffix} {_number(row[-1])}'
+    yield f'{metric.name}_count{suffix} {cumulative}'
+
+
+def _alive(pid):
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+registry = Registry()
+
+
+def timed(histogram, label):
+    """Decorator recording each call's duration in ``histogram`` under ``label``."""
+    def wrap(fn):
+        if not METRICS_ENABLED:
+            return fn
+
+        def timed_fn(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start, label)
+        timed_fn.__name__ = fn.__name__
+        timed_fn.__doc__ = fn.__doc__
+        return timed_fn
+    return wrap
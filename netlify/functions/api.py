@@ -0,0 +1,49 @@
+# Single Netlify function serving every API route; see core.py for the handlers.
+#
+# netlify.toml rewrites /api/* and /agriculture/* here, so the static frontend can
+# use the same paths as the Flask backend. /.netlify/functions/api/<route> works too.
+import json
+
+import core
+
+HEADERS = {
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Origin': '*'
+}
+
+_FUNCTIONS_PREFIX = '.netlify/functions/'
+
+
+def _route(path):
+    # Netlify may pass either the public path (/api/weather) or the function path
+    # (/.netlify/functions/api/agriculture/recommendation, /.netlify/functions/weather)
+    name = (path or '').strip('/')
+    if name.startswith(_FUNCTIONS_PREFIX):
+        name = name[len(_FUNCTIONS_PREFIX):]
+    route = core.ROUTES.get(name)
+    if route is None and name.startswith('api/'):
+        route = core.ROUTES.get(name[len('api/'):])
+    return route
+
+
+def handler(event, context):
+    if event.get('httpMethod') == 'OPTIONS':
+        return {
+            'statusCode': 204,
+            'headers': dict(HEADERS, **{
+                'Access-Control-Allow-Headers': 'Content-Type,Authorization',
+                'Access-Control-Allow-Methods': 'GET,OPTIONS'
+            }),
+            'body': ''
+        }
+
+    route = _route(event.get('path'))
+    if route is None:
+        payload, status = { 'error': 'Not found' }, 404
+    else:
+        payload, status = route(event.get('queryStringParameters') or {})
+    return {
+        'statusCode': status,
+        'headers': HEADERS,
+        'body': json.dumps(payload)
+    }
@@ -0,0 +1,99 @@
+# Copy of the top-level breaker.py; Netlify bundles only this directory, so keep the two in sync.
+
+import threading
+import time
+from collections import deque
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose breaker is open."""
+
+    def __init__(self, name):
+        super().__init__(f'Circuit breaker for {name} is open')
+        self.name = name
+
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker over a sliding time window.
+
+    A call fails if it raised, returned a 429/5xx or took longer than
+    ``slow_call`` seconds. Once at least ``min_calls`` calls in the last
+    ``window`` seconds failed at ``failure_rate`` or more, the breaker opens and
+    rejects calls for ``open_seconds``. It then lets a single probe through
+    (half-open): success closes it, failure opens it again.
+    """
+
+    def __init__(self, name, failure_rate=0.5, min_calls=5, window=30, slow_call=5, open_seconds=30):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window = window
+        self.slow_call = slow_call
+        self.open_seconds = open_seconds
+        self.state = CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self._calls = deque()  # (finished_at, failed)
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.rejected = 0
+
+    def allow(self):
+        """True if a call may go ahead now; claims the probe slot when half-open."""
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+                self.state = HALF_OPEN
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            self.rejected += 1
+            return False
+
+    def rejecting(self):
+        """True while calls are failed fast; unlike allow() this claims and counts nothing."""
+        with self._lock:
+            return self.state == OPEN and time.monotonic() - self._opened_at < self.open_seconds
+
+    def record(self, failed, elapsed=0.0):
+        failed = failed or elapsed > self.slow_call
+        now = time.monotonic()
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probing = False
+                if failed:
+                    self._open(now)
+                else:
+                    self.state = CLOSED
+                    self._calls.clear()
+                return
+            if self.state == OPEN:
+                # A call admitted before the breaker opened; the verdict is already in
+                return
+            self._calls.append((now, failed))
+            while self._calls and self._calls[0][0] < now - self.window:
+                self._calls.popleft()
+            failures = sum(1 for _, f in self._calls if f)
+            if len(self._calls) >= self.min_calls and failures >= self.failure_rate * len(self._calls):
+                self._open(now)
+
+    def _open(self, now):
+        self.state = OPEN
+        self._opened_at = now
+        self._calls.clear()
+        self.opened += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'state': self.state,
+                'recentCalls': len(self._calls),
+                'recentFailures': sum(1 for _, f in self._calls if f),
+                'opened': self.opened,
+                'rejected': self.rejected,
+            }
@@ -0,0 +1,207 @@
+# Copy of the top-level cache.py; Netlify bundles only this directory, so keep the two in sync.
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Bounded in-process LRU cache with a freshness TTL per entry.
+
+    Entries older than ``ttl`` are still returned as stale for ``stale_ttl``
+    more seconds so callers can serve them while one refresh runs.
+    """
+
+    def __init__(self, maxsize=256, ttl=600, stale_ttl=0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._data = OrderedDict()  # key -> (value, stored_at)
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def get(self, key):
+        """Return ``(value, state)`` where state is 'fresh', 'stale' or None."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, None
+            value, stored_at = entry
+            age = now - stored_at
+            if age <= self.ttl:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value, 'fresh'
+            if age <= self.ttl + self.stale_ttl:
+                self._data.move_to_end(key)
+                self.stale_hits += 1
+                return value, 'stale'
+            # Expired entries stay until LRU eviction as last_good() fallbacks
+            self.misses += 1
+            return None, None
+
+    def last_good(self, key):
+        """The stored value for ``key`` however old it is, or None."""
+        with self._lock:
+            entry = self._data.get(key)
+            return None if entry is None else entry[0]
+
+    def expires_in(self, key):
+        """Seconds until ``key`` turns stale (negative once it has), or None if absent.
+
+        Does not count as an access: no LRU bump, no hit/miss.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            return entry[1] + self.ttl - time.monotonic()
+
+    def stats(self):
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            'entries': len(self._data),
+            'hits': self.hits,
+            'staleHits': self.stale_hits,
+            'misses': self.misses,
+            # Stale hits are served without waiting, so they count towards the ratio
+            'hitRatio': round((self.hits + self.stale_hits) / lookups, 4) if lookups else None,
+        }
+
+    def set(self, key, value):
+        with self._lock:
+            self.stores += 1
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def begin_refresh(self, key):
+        """Claim the refresh of ``key``; False if another caller already has it."""
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def end_refresh(self, key):
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._refreshing.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class ByteLRU:
+    """In-process LRU of bytes values bounded by their total size rather than a count."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._data[key] = value
+            self._bytes += len(value)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._data),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._data)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Collapse concurrent calls for the same key into one in-flight call.
+
+    The first caller runs ``fn``; callers arriving while it runs wait for it
+    and receive the same result, or have the same exception re-raised.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, timeout=None):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            if not call.done.wait(timeout):
+                raise TimeoutError(f'Timed out waiting for in-flight call {key!r}')
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,210 @@
+# Shared request handling for the Netlify router function (api.py).
+#
+# Everything here lives at module level, so a warm container keeps its caches and
+# the pooled upstream session between invocations. Handlers take the query
+# parameters and return ``(payload, status)``; api.py turns that into a response.
+#
+# requests (via upstream) and the agriculture rules/NumPy catalog are imported on
+# first use, so a cold start only pays for what the invoked route needs. Set
+# EAGER_INIT=1 to load everything at import time instead, e.g. where the platform
+# runs module init before the first request is timed.
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import payloads
+from cache import TTLCache
+from forecast_series import DEFAULT_HORIZON_HOURS, parse_horizon
+
+CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 512))
+weather_cache = TTLCache(CACHE_MAX_ENTRIES, int(os.environ.get('WEATHER_CACHE_TTL', 600)))
+forecast_cache = TTLCache(CACHE_MAX_ENTRIES, int(os.environ.get('FORECAST_CACHE_TTL', 10800)))
+
+# Weather and forecast for /api/dashboard are fetched side by side
+_pool = ThreadPoolExecutor(max_workers=2)
+
+EAGER_INIT = os.environ.get('EAGER_INIT', '') == '1'
+
+HORIZON_ERROR = 'horizon must be 24h, 48h, 72h, 5d or a number of hours up to 120'
+
+# Returned while an endpoint's circuit breaker is open
+UPSTREAM_UNAVAILABLE = 'Weather service is temporarily unavailable. Please try again shortly.'
+
+
+def _api_key():
+    return os.environ.get('OPENWEATHER_API_KEY', '')
+
+
+def _cache_key(city):
+    return ' '.join(city.lower().split())
+
+
+def _cached(cache, key, fetch):
+    # No stale-while-revalidate here: a frozen container cannot finish background work
+    value, state = cache.get(key)
+    if state == 'fresh':
+        return value
+    result = fetch()
+    if result.get('ok'):
+        cache.set(key, result)
+    return result
+
+
+def init():
+    """Do every lazy import and one-time setup now."""
+    import upstream
+    from agriculture_logic import CROP_RULES, build_agriculture_recommendation, recommend_crops_from_averages
+    upstream.get_session()
+    recommend_crops_from_averages(25.0, 60.0, 0.0)
+    # Compiles each crop's rules, plus the generic ones for unknown crops
+    for crop in list(CROP_RULES) + ['']:
+        build_agriculture_recommendation(crop, 0.0, 0.0, 0.0)
+
+
+def _fetch(path, city, unavailable, timed_out, unexpected):
+    import requests
+    import upstream
+    params = {
+        'q': city,
+        'appid': _api_key(),
+        'units': 'metric'
+    }
+    try:
+        response = upstream.get(upstream.openweather_url(path), params=params)
+        data = response.json()
+        if response.status_code == 200:
+            return { 'ok': True, 'data': data }
+        message = data.get('message', unavailable) if isinstance(data, dict) else unavailable
+        return { 'ok': False, 'error': f"{response.status_code}: {message}", 'status': 502 }
+    except upstream.CircuitOpenError:
+        return { 'ok': False, 'error': UPSTREAM_UNAVAILABLE, 'status': 503 }
+    except requests.Timeout:
+        return { 'ok': False, 'error': timed_out, 'status': 504 }
+    except Exception:
+        return { 'ok': False, 'error': unexpected, 'status': 500 }
+
+
+def get_weather(city):
+    return _cached(weather_cache, _cache_key(city), lambda: _fetch(
+        'data/2.5/weather', city, 'Unable to fetch weather data',
+        'Request timed out. Please try again.', 'Unexpected error fetching weather data.'))
+
+
+def get_forecast(city):
+    return _cached(forecast_cache, _cache_key(city), lambda: _fetch(
+        'data/2.5/forecast', city, 'Unable to fetch forecast',
+        'Forecast request timed out.', 'Unexpected error fetching forecast.'))
+
+
+def _fetch_status(result):
+    return result.get('status', 502)
+
+
+def weather(params):
+    city = (params.get('city') or '').strip()
+    if not _api_key():
+        return { 'error': 'API key is not configured' }, 500
+    if not city:
+        return { 'error': 'City is required' }, 400
+    w = get_weather(city)
+    if w.get('ok'):
+        return { 'ok': True, 'data': w.get('data') }, 200
+    return { 'ok': False, 'error': w.get('error') }, _fetch_status(w)
+
+
+def forecast(params):
+    city = (params.get('city') or '').strip()
+    if not _api_key():
+        return { 'error': 'API key is not configured' }, 500
+    if not city:
+        return { 'error': 'City is required' }, 400
+    f = get_forecast(city)
+    if f.get('ok'):
+        return { 'ok': True, 'data': f.get('data') }, 200
+    return { 'ok': False, 'error': f.get('error') }, _fetch_status(f)
+
+
+def _crop_recommendations_from(f, city, hours=DEFAULT_HORIZON_HOURS, daily=False):
+    from agriculture_logic import recommend_crops_from_averages
+    return payloads.crop_recommendations(f, city, recommend_crops_from_averages, hours, daily)
+
+
+def crop_recommendations(params):
+    city = (params.get('city') or '').strip()
+    if not city:
+        return { 'error': 'City is required' }, 400
+    hours = parse_horizon(params.get('horizon'))
+    if hours is None:
+        return { 'error': HORIZON_ERROR }, 400
+    window = (params.get('window') or '').strip().lower()
+    if window not in ('', 'day'):
+        return { 'error': "window must be 'day'" }, 400
+    if not _api_key():
+        return { 'error': 'API key is not configured' }, 500
+    f = get_forecast(city)
+    if not f.get('ok'):
+        return { 'error': f.get('error', 'Failed to fetch forecast') }, _fetch_status(f)
+    return _crop_recommendations_from(f, city, hours, daily=window == 'day'), 200
+
+
+def agriculture_recommendation(params):
+    from agriculture_logic import build_agriculture_recommendation
+
+    crop = (params.get('crop') or '').strip()
+    city = (params.get('city') or '').strip()
+    try:
+        temperature, humidity, rainfall = (float(params[name]) if params.get(name) else None
+                                           for name in ('temperature', 'humidity', 'rainfall'))
+    except (ValueError, TypeError):
+        temperature = humidity = rainfall = None
+
+    if not crop or temperature is None or humidity is None:
+        return { 'error': 'Missing required parameters: crop, temperature, humidity' }, 400
+
+    used_rainfall = rainfall if rainfall is not None else 0.0
+    if (rainfall is None or rainfall == 0.0) and city and _api_key():
+        f = get_forecast(city)
+        if f.get('ok'):
+            av = payloads.forecast_averages(f, DEFAULT_HORIZON_HOURS)
+            if av.get('avgRainfall') is not None:
+                used_rainfall = float(av.get('avgRainfall'))
+
+    result = build_agriculture_recommendation(crop, temperature, humidity, used_rainfall)
+    result['usedRainfall'] = used_rainfall
+    return result, 200
+
+
+def dashboard(params):
+    # Imported here rather than racing the same import in the pool thread
+    import upstream  # noqa: F401
+    from agriculture_logic import build_agriculture_recommendation
+
+    city = (params.get('city') or '').strip()
+    crop = (params.get('crop') or '').strip()
+    if not city:
+        return { 'ok': False, 'error': 'City is required' }, 400
+    if not _api_key():
+        return { 'ok': False, 'error': 'API key is not configured' }, 500
+
+    forecast_future = _pool.submit(get_forecast, city)
+    w = get_weather(city)
+    f = forecast_future.result()
+    return payloads.dashboard(city, crop, w, f, _crop_recommendations_from, build_agriculture_recommendation)
+
+
+if EAGER_INIT:
+    init()
+
+
+# Route name -> handler. The router accepts both the Flask paths (/api/weather,
+# /agriculture/recommendation, ...) and the old per-function names (weather, ...).
+ROUTES = {
+    'api/weather': weather,
+    'api/forecast': forecast,
+    'api/dashboard': dashboard,
+    'agriculture/recommendation': agriculture_recommendation,
+    'agriculture/crop-recommendations': crop_recommendations,
+    'weather': weather,
+    'forecast': forecast,
+    'agriculture-recommendation': agriculture_recommendation,
+    'crop-recommendations': crop_recommendations,
+}
@@ -1,63 +1,2 @@
-import json
-import os
-import requests
-
-def handler(event, context):
-    api_key = os.environ.get('OPENWEATHER_API_KEY', '')
-    if not api_key:
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': 'API key is not configured'})
-        }
-
-    # Parse query parameters
-    city = event.get('queryStringParameters', {}).get('city', '') if event.get('queryStringParameters') else ''
-    
-    if not city:
-        return {
-            'statusCode': 400,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': 'City is required'})
-        }
-
-    # Get forecast data
-    base_url = "https://api.openweathermap.org/data/2.5/forecast"
-    params = {
-        'q': city,
-        'appid': api_key,
-        'units': 'metric'
-    }
-    
-    try:
-        response = requests.get(base_url, params=params, timeout=10)
-        data = response.json()
-        
-        if response.status_code == 200:
-            result = { 'ok': True, 'data': data }
-            status_code = 200
-        else:
-            message = data.get('message', 'Unable to fetch forecast') if isinstance(data, dict) else 'Unable to fetch forecast'
-            result = { 'ok': False, 'error': f"{response.status_code}: {message}" }
-            status_code = 502
-    except requests.Timeout:
-        result = { 'ok': False, 'error': 'Forecast request timed out.' }
-        status_code = 504
-    except Exception:
-        result = { 'ok': False, 'error': 'Unexpected error fetching forecast.' }
-        status_code = 500
-    
-    return {
-        'statusCode': status_code,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*'
-        },
-        'body': json.dumps(result)
-    }
+# Kept so existing /.netlify/functions/<name> URLs still work; all routes are served by api.py.
+from api import handler
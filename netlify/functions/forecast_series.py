@@ -0,0 +1,162 @@
+# Copy of the top-level forecast_series.py; Netlify bundles only this directory, so keep the two in sync.
+
+# OpenWeather 5-day / 3-hour forecast parsed once into numeric arrays.
+#
+# Prefix sums make any window mean/total O(1), and sparse tables make window
+# min/max O(1), so several horizons and per-day breakdowns of the same forecast
+# cost one pass over the payload. A forecast is at most 40 slots, so plain lists
+# beat NumPy here: per-call overhead would dominate.
+from datetime import datetime, timezone
+from itertools import accumulate
+
+SLOT_HOURS = 3
+
+# Named horizons accepted by the crop-recommendations route, in hours
+HORIZONS = { '24h': 24, '48h': 48, '72h': 72, '5d': 120 }
+DEFAULT_HORIZON_HOURS = 72
+
+
+def _number(value):
+    # Same filter as the original list comprehensions: anything but int/float is dropped
+    return value if isinstance(value, (int, float)) else None
+
+
+def _prefix(values):
+    sums = list(accumulate((0.0 if v is None else v for v in values), initial=0.0))
+    counts = list(accumulate((v is not None for v in values), initial=0))
+    return sums, counts
+
+
+def _min(a, b):
+    return b if a is None else a if b is None else min(a, b)
+
+
+def _max(a, b):
+    return b if a is None else a if b is None else max(a, b)
+
+
+def _sparse_table(values, reduce, builtin):
+    # The builtin min/max runs in C; the None-aware version is only needed for gappy payloads
+    reduce = reduce if None in values else builtin
+    table = [values]
+    width = 1
+    while width * 2 <= len(values):
+        prev = table[-1]
+        table.append(list(map(reduce, prev, prev[width:])))
+        width *= 2
+    return table
+
+
+def _round(value):
+    return None if value is None else round(value, 1)
+
+
+class ForecastSeries:
+    def __init__(self, forecast_data):
+        items = (forecast_data or {}).get('list', []) or []
+        temps, hums, rains, dts = [], [], [], []
+        for item in items:
+            main = item.get('main', {})
+            temps.append(_number(main.get('temp')))
+            hums.append(_number(main.get('humidity')))
+            rain_obj = item.get('rain', {})
+            r = 0.0
+            if isinstance(rain_obj, dict):
+                r = rain_obj.get('3h') or rain_obj.get('1h') or 0.0
+            rains.append(_number(r))
+            dts.append(item.get('dt'))
+        self.dt = dts
+        self.temp = temps
+        self.humidity = hums
+        self.rain = rains
+        self.tz_offset = ((forecast_data or {}).get('city') or {}).get('timezone') or 0
+        self._temp_sum, self._temp_n = _prefix(self.temp)
+        self._hum_sum, self._hum_n = _prefix(self.humidity)
+        self._rain_sum, self._rain_n = _prefix(self.rain)
+        # Missing slots are skipped; a window with no valid temperature yields None
+        self._temp_min = _sparse_table(self.temp, _min, min)
+        self._temp_max = _sparse_table(self.temp, _max, max)
+
+    def __len__(self):
+        return len(self.temp)
+
+    def _range(self, table, start, end, reduce):
+        level = (end - start).bit_length() - 1
+        return _round(reduce(table[level][start], table[level][end - (1 << level)]))
+
+    def window(self, start, end):
+        """Aggregates over slots [start, end); same keys as average_conditions_from_forecast plus min/max."""
+        start = max(0, min(start, len(self)))
+        end = max(start, min(end, len(self)))
+        temp_n = self._temp_n[end] - self._temp_n[start]
+        hum_n = self._hum_n[end] - self._hum_n[start]
+        rain_n = self._rain_n[end] - self._rain_n[start]
+        empty = end == start
+        return {
+            'avgTemp': _round((self._temp_sum[end] - self._temp_sum[start]) / temp_n) if temp_n else None,
+            'avgHumidity': _round((self._hum_sum[end] - self._hum_sum[start]) / hum_n) if hum_n else None,
+            'avgRainfall': _round(self._rain_sum[end] - self._rain_sum[start]) if rain_n else None,
+            'minTemp': None if empty else self._range(self._temp_min, start, end, _min),
+            'maxTemp': None if empty else self._range(self._temp_max, start, end, _max),
+        }
+
+    def horizon(self, hours):
+        """Aggregates over the first ``hours`` of the forecast."""
+        return self.window(0, -(-hours // SLOT_HOURS))
+
+    def daily(self):
+        """Per-day aggregates, split on the city's local calendar date."""
+        days = []
+        start = 0
+        current = None
+        for i, dt in enumerate(self.dt):
+            date = None
+            if isinstance(dt, (int, float)):
+                date = datetime.fromtimestamp(dt + self.tz_offset, tz=timezone.utc).date().isoformat()
+            if date != current and i > start:
+                days.append(dict(date=current, **self.window(start, i)))
+                start = i
+            current = date
+        if start < len(self):
+            days.append(dict(date=current, **self.window(start, len(self))))
+        return days
+
+
+def compact_forecast(data):
+    """Project a raw forecast payload onto the fields ForecastSeries reads.
+
+    Cached forecasts keep only this record: a few hundred bytes per city instead
+    of ~15 KB, and later parses skip everything we never look at.
+    """
+    city = data.get('city') or {}
+    slots = []
+    for item in data.get('list', []) or []:
+        main = item.get('main', {})
+        slot = { 'dt': item.get('dt'), 'main': { 'temp': main.get('temp'), 'humidity': main.get('humidity') } }
+        if 'rain' in item:
+            slot['rain'] = item['rain']
+        slots.append(slot)
+    return {
+        'city': { key: city[key] for key in ('name', 'country', 'timezone', 'coord') if key in city },
+        'list': slots,
+    }
+
+
+def parse_horizon(value):
+    """Hours for a horizon like '24h', '5d' or a bare number of hours; None if invalid.
+
+    Missing or blank means DEFAULT_HORIZON_HOURS.
+    """
+    value = (value or '').strip().lower()
+    if not value:
+        return DEFAULT_HORIZON_HOURS
+    if value in HORIZONS:
+        return HORIZONS[value]
+    try:
+        if value.endswith('d'):
+            hours = int(value[:-1]) * 24
+        else:
+            hours = int(value[:-1] if value.endswith('h') else value)
+    except ValueError:
+        return None
+    return hours if 0 < hours <= HORIZONS['5d'] else None
@@ -0,0 +1,72 @@
+# Copy of the top-level payloads.py; Netlify bundles only this directory, so keep the two in sync.
+
+# Response bodies shared by the Flask app (app.py, and asgi.py through it) and
+# the Netlify router (netlify/functions/core.py).
+#
+# The agriculture functions are passed in rather than imported: the app passes
+# its timed wrappers, and the Netlify router imports the rules and the NumPy
+# catalog only when a route first needs them.
+from forecast_series import DEFAULT_HORIZON_HOURS, ForecastSeries
+
+
+def forecast_series(f):
+    """The parsed ForecastSeries of a forecast result, memoized on the (cached) result."""
+    series = f.get('series')
+    if series is None:
+        series = f['series'] = ForecastSeries(f.get('data'))
+    return series
+
+
+def forecast_averages(f, hours):
+    return forecast_series(f).horizon(hours)
+
+
+def crop_recommendations(f, city, recommend, hours=DEFAULT_HORIZON_HOURS, daily=False, averages=forecast_averages):
+    """/agriculture/crop-recommendations body for a forecast result, or ``{city, error}``.
+
+    ``recommend`` is recommend_crops_from_averages; ``averages(f, hours)`` the horizon averages.
+    """
+    if not f.get('ok'):
+        return { 'city': city, 'error': f.get('error', 'Failed to fetch forecast') }
+    avg = averages(f, hours)
+    recos = recommend(avg.get('avgTemp'), avg.get('avgHumidity'), avg.get('avgRainfall'))
+    payload = { 'city': city, 'horizonHours': hours, 'averages': avg, 'recommendedCrops': recos }
+    if daily:
+        payload['daily'] = forecast_series(f).daily()
+    return payload
+
+
+def dashboard(city, crop, w, f, recommendations, build_recommendation):
+    """``(payload, status)`` for /api/dashboard from a weather and a forecast result.
+
+    ``recommendations(f, city)`` is crop_recommendations with the caller's functions
+    bound; ``build_recommendation`` is build_agriculture_recommendation.
+    """
+    if not w.get('ok'):
+        return { 'ok': False, 'error': w.get('error') }, w.get('status', 502)
+    weather = w.get('data')
+    payload = { 'ok': True, 'city': city, 'weather': weather }
+    if w.get('stale') or f.get('stale'):
+        # Served from the last good payload while OpenWeather is failing
+        payload['stale'] = True
+    recos = recommendations(f, city)
+    if 'error' in recos:
+        payload['forecastError'] = recos['error']
+    else:
+        payload['horizonHours'] = recos['horizonHours']
+        payload['averages'] = recos['averages']
+        payload['recommendedCrops'] = recos['recommendedCrops']
+
+    # Same rainfall proxy as /agriculture/recommendation: current rain, else the forecast total
+    rain = weather.get('rain') or {}
+    rainfall = rain.get('1h') or rain.get('3h') or 0.0
+    if not rainfall and payload.get('averages', {}).get('avgRainfall') is not None:
+        rainfall = float(payload['averages']['avgRainfall'])
+    payload['rainfall'] = rainfall
+
+    main = weather.get('main', {})
+    if crop and main.get('temp') is not None and main.get('humidity') is not None:
+        recommendation = build_recommendation(crop, float(main['temp']), float(main['humidity']), rainfall)
+        recommendation['usedRainfall'] = rainfall
+        payload['recommendation'] = recommendation
+    return payload, 200
@@ -0,0 +1,142 @@
+# Copy of the top-level upstream.py; Netlify bundles only this directory, so keep the two in sync.
+
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from breaker import CircuitBreaker, CircuitOpenError
+
+# Shared HTTP client for OpenWeather calls. Each process keeps one pooled Session
+# so repeat calls reuse keep-alive connections instead of paying a new TCP + TLS
+# handshake every time.
+OPENWEATHER_BASE_URL = os.environ.get('OPENWEATHER_BASE_URL', 'https://api.openweathermap.org').rstrip('/')
+POOL_SIZE = int(os.environ.get('UPSTREAM_POOL_SIZE', 10))
+CONNECT_TIMEOUT = float(os.environ.get('UPSTREAM_CONNECT_TIMEOUT', 3.05))
+READ_TIMEOUT = float(os.environ.get('UPSTREAM_READ_TIMEOUT', 7))
+MAX_RETRIES = int(os.environ.get('UPSTREAM_MAX_RETRIES', 2))
+BACKOFF_BASE = float(os.environ.get('UPSTREAM_BACKOFF_BASE', 0.2))
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# One breaker per OpenWeather endpoint (weather, forecast, geocoding). While a
+# breaker is open, calls fail fast with CircuitOpenError instead of tying up a
+# worker for the full timeout.
+BREAKER_FAILURE_RATE = float(os.environ.get('BREAKER_FAILURE_RATE', 0.5))
+BREAKER_MIN_CALLS = int(os.environ.get('BREAKER_MIN_CALLS', 5))
+BREAKER_WINDOW = float(os.environ.get('BREAKER_WINDOW', 30))
+BREAKER_SLOW_CALL = float(os.environ.get('BREAKER_SLOW_CALL', 5))
+BREAKER_OPEN_SECONDS = float(os.environ.get('BREAKER_OPEN_SECONDS', 30))
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+# Optional callback(endpoint, outcome, seconds) for every attempt: outcome is the
+# HTTP status code, 'timeout', 'error' or 'circuit_open' (with seconds None).
+_observer = None
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+def openweather_url(path):
+    return f'{OPENWEATHER_BASE_URL}/{path.lstrip("/")}'
+
+
+def get_session():
+    """Return this process's pooled Session, creating it on first use or after a fork."""
+    global _session, _session_pid
+    pid = os.getpid()
+    if _session is not None and _session_pid == pid:
+        return _session
+    with _session_lock:
+        if _session is None or _session_pid != pid:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _session = session
+            _session_pid = pid
+    return _session
+
+
+def set_observer(fn):
+    global _observer
+    _observer = fn
+
+
+def _observe(endpoint, outcome, seconds):
+    if _observer is not None:
+        _observer(endpoint, outcome, seconds)
+
+
+def breaker_for(url):
+    """The circuit breaker guarding ``url``'s endpoint (query string ignored)."""
+    name = url.split('?', 1)[0].replace(OPENWEATHER_BASE_URL, '', 1).strip('/')
+    breaker = _breakers.get(name)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.setdefault(name, CircuitBreaker(
+                name, BREAKER_FAILURE_RATE, BREAKER_MIN_CALLS, BREAKER_WINDOW, BREAKER_SLOW_CALL, BREAKER_OPEN_SECONDS))
+    return breaker
+
+
+def breaker_states():
+    """``{endpoint: state}`` for every breaker created so far in this process."""
+    return { name: breaker.state for name, breaker in sorted(_breakers.items()) }
+
+
+def breaker_rejecting(name):
+    """True while the breaker for endpoint ``name`` (e.g. 'data/2.5/weather') fails calls fast."""
+    breaker = _breakers.get(name)
+    return breaker is not None and breaker.rejecting()
+
+
+def breaker_stats():
+    return { name: breaker.stats() for name, breaker in sorted(_breakers.items()) }
+
+
+def _backoff(attempt):
+    # Full jitter: spread retries from many workers over [0, base * 2^attempt)
+    return random.uniform(0, BACKOFF_BASE * (2 ** attempt))
+
+
+def get(url, params=None):
+    """GET ``url`` on the pooled session with connect/read timeouts.
+
+    Connection failures (including connect timeouts) and 429/5xx responses are
+    retried up to MAX_RETRIES times with jittered exponential backoff. Read
+    timeouts are not retried since the full read budget was already spent.
+    Every attempt is reported to the endpoint's circuit breaker and to the
+    observer, if one is set, and CircuitOpenError is raised without calling out
+    while the breaker is open.
+    """
+    session = get_session()
+    breaker = breaker_for(url)
+    for attempt in range(MAX_RETRIES + 1):
+        if not breaker.allow():
+            _observe(breaker.name, 'circuit_open', None)
+            raise CircuitOpenError(breaker.name)
+        started = time.monotonic()
+        try:
+            response = session.get(url, params=params, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+        except requests.ConnectionError as e:
+            breaker.record(True)
+            _observe(breaker.name, 'timeout' if isinstance(e, requests.Timeout) else 'error', time.monotonic() - started)
+            if attempt == MAX_RETRIES:
+                raise
+        except Exception as e:
+            # Anything else (bad URL, LocationParseError, ...) still has to release a half-open probe
+            breaker.record(True)
+            _observe(breaker.name, 'timeout' if isinstance(e, requests.Timeout) else 'error', time.monotonic() - started)
+            raise
+        else:
+            elapsed = time.monotonic() - started
+            breaker.record(response.status_code in RETRY_STATUSES, elapsed)
+            _observe(breaker.name, response.status_code, elapsed)
+            if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                return response
+        time.sleep(_backoff(attempt))
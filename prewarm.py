@@ -0,0 +1,191 @@
+# Background refresh of the most-requested cities before their cache entries expire.
+#
+# Access frequency is tracked with exponentially decaying counters, so a city that
+# was hot yesterday morning fades out instead of holding a slot forever. Every
+# interval the top-N cities whose weather/forecast entries expire within `lead`
+# seconds (or are missing) are refreshed, most urgent first, while a token bucket
+# caps upstream calls per minute.
+import heapq
+import math
+import os
+import threading
+import time
+from collections import deque
+
+
+class DecayingCounter:
+    """Per-key access scores that halve every ``half_life`` seconds.
+
+    Scores are stored scaled by exp(rate * (t - origin)) so an access is a single
+    addition; everything is rescaled once the exponent grows large.
+    """
+
+    def __init__(self, half_life=3600, maxsize=1024):
+        self.maxsize = maxsize
+        self._rate = math.log(2) / half_life
+        self._origin = time.monotonic()
+        self._scores = {}
+        self._lock = threading.Lock()
+
+    def add(self, key, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            exponent = (now - self._origin) * self._rate
+            if exponent > 50:
+                factor = math.exp(-exponent)
+                self._scores = { k: v * factor for k, v in self._scores.items() }
+                self._origin = now
+                exponent = 0.0
+            self._scores[key] = self._scores.get(key, 0.0) + math.exp(exponent)
+            if len(self._scores) > 2 * self.maxsize:
+                keep = heapq.nlargest(self.maxsize, self._scores.items(), key=lambda item: item[1])
+                self._scores = dict(keep)
+
+    def top(self, n, now=None):
+        """``[(key, score), ...]`` for the ``n`` highest current scores."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            scale = math.exp(-(now - self._origin) * self._rate)
+            best = heapq.nlargest(n, self._scores.items(), key=lambda item: item[1])
+        return [(key, score * scale) for key, score in best]
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._scores
+
+    def __len__(self):
+        return len(self._scores)
+
+
+class TokenBucket:
+    """Allows ``rate`` takes per minute on average, with bursts of up to ``burst``."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate / 60.0
+        self.capacity = float(rate if burst is None else burst)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class Prewarmer:
+    """Keeps the hottest cities' cache entries fresh from a background thread.
+
+    ``targets`` is a list of ``(name, cache, fetch)`` where ``fetch(context)``
+    returns the upstream result for a city, and ``refresh(cache, key, fetch)``
+    stores it and returns the result, or None if a refresh was already running
+    (the app passes its single-flight refresh so prewarms and request misses never
+    double up). Cities are recorded with ``touch(city_key, context)``.
+    """
+
+    def __init__(self, targets, refresh, top_n=0, interval=30, lead=60, budget=30, half_life=3600):
+        self.targets = targets
+        self.refresh = refresh
+        self.top_n = top_n
+        self.interval = interval
+        self.lead = lead
+        self.counter = DecayingCounter(half_life, maxsize=max(64, 4 * top_n))
+        self.budget = TokenBucket(budget)
+        self._contexts = {}
+        self._lock = threading.Lock()
+        self._thread_pid = None
+        self.refreshes = 0
+        self.warmed = 0
+        self.skipped = 0
+        self.failures = 0
+        # Seconds between an entry turning stale and its refresh landing; negative means early
+        self._lags = deque(maxlen=256)
+
+    @property
+    def enabled(self):
+        return self.top_n > 0
+
+    def touch(self, city_key, context):
+        if not self.enabled:
+            return
+        self.counter.add(city_key)
+        with self._lock:
+            self._contexts[city_key] = context
+            if len(self._contexts) > 2 * self.counter.maxsize:
+                self._contexts = { k: v for k, v in self._contexts.items() if k in self.counter }
+        self._ensure_started()
+
+    def _ensure_started(self):
+        # One scheduler per process; forked workers start their own
+        if self._thread_pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread_pid == os.getpid():
+                return
+            self._thread_pid = os.getpid()
+            threading.Thread(target=self._run, name='prewarm', daemon=True).start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.run_once()
+            except Exception:
+                self.failures += 1
+
+    def due(self):
+        """``(stale_at, name, cache, key, fetch, context)`` for hot entries needing a refresh, most urgent first.
+
+        stale_at is a time.monotonic() value, or -inf for entries not in the cache.
+        """
+        now = time.monotonic()
+        with self._lock:
+            contexts = dict(self._contexts)
+        due = []
+        for city_key, _ in self.counter.top(self.top_n):
+            context = contexts.get(city_key)
+            if context is None:
+                continue
+            for name, cache, fetch in self.targets:
+                key = (name,) + city_key
+                remaining = cache.expires_in(key)
+                if remaining is None or remaining <= self.lead:
+                    due.append((-math.inf if remaining is None else now + remaining, name, cache, key, fetch, context))
+        due.sort(key=lambda item: item[0])
+        return due
+
+    def run_once(self):
+        for stale_at, name, cache, key, fetch, context in self.due():
+            if not self.budget.take():
+                self.skipped += 1
+                continue
+            result = self.refresh(cache, key, lambda: fetch(context))
+            if result is None:
+                # A request-triggered refresh already had it
+                continue
+            if not result.get('ok'):
+                self.failures += 1
+            elif stale_at == -math.inf:
+                self.warmed += 1
+            else:
+                self.refreshes += 1
+                self._lags.append(time.monotonic() - stale_at)
+
+    def stats(self):
+        lags = list(self._lags)
+        return {
+            'enabled': self.enabled,
+            'tracked': len(self.counter),
+            'hot': [{ 'key': list(key), 'score': round(score, 2) } for key, score in self.counter.top(min(self.top_n, 10))],
+            'refreshes': self.refreshes,
+            'warmed': self.warmed,
+            'skippedBudget': self.skipped,
+            'failures': self.failures,
+            'refreshLagAvg': round(sum(lags) / len(lags), 2) if lags else None,
+            'refreshLagMax': round(max(lags), 2) if lags else None,
+        }
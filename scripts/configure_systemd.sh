@@ -15,8 +15,9 @@ User=ec2-user
 Group=ec2-user
 WorkingDirectory=/home/ec2-user/weather-app
 Environment=PYTHONUNBUFFERED=1
+Environment=WEB_THREADS=4
 EnvironmentFile=-/etc/sysconfig/weather
-ExecStart=/home/ec2-user/weather-app/.venv/bin/gunicorn -w 2 -b 0.0.0.0:8080 app:app
+ExecStart=/bin/sh -c 'exec /home/ec2-user/weather-app/.venv/bin/gunicorn -w 2 -k gthread --threads "$WEB_THREADS" -b 0.0.0.0:8080 app:app'
 Restart=always
 RestartSec=3
 
@@ -0,0 +1,73 @@
+# Per-request phase timings for the Server-Timing response header.
+#
+# A request opens a span table with start(); code on the request's thread wraps
+# its phases in span('upstream') / span('render') etc., and repeated spans of
+# one name add up. Outside a request (background refreshes, the fan-out pool)
+# spans cost one ContextVar lookup and record nothing.
+import contextvars
+import os
+import time
+
+SERVER_TIMING = os.environ.get('SERVER_TIMING', '1') != '0'
+# Requests slower than this are logged with their breakdown; 0 disables
+SLOW_REQUEST_MS = float(os.environ.get('SLOW_REQUEST_MS', 1000))
+ENABLED = SERVER_TIMING or SLOW_REQUEST_MS > 0
+
+_spans = contextvars.ContextVar('server_timing_spans', default=None)
+
+
+def start():
+    """Begin collecting spans for the current request; returns the span table."""
+    spans = {}
+    _spans.set(spans)
+    return spans
+
+
+def current():
+    """The current request's span table, or None."""
+    return _spans.get()
+
+
+def finish():
+    """Stop collecting; returns the span table (None if start() was not called)."""
+    spans = _spans.get()
+    _spans.set(None)
+    return spans
+
+
+class span:
+    """Context manager adding the time spent inside it to the current request's ``name`` span."""
+    __slots__ = ('name', 'spans', 'started')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.spans = _spans.get()
+        if self.spans is not None:
+            self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self.spans is not None:
+            self.spans[self.name] = self.spans.get(self.name, 0.0) + time.perf_counter() - self.started
+        return False
+
+
+def timed(name):
+    """Decorator form of span(name)."""
+    def wrap(fn):
+        def timed_fn(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        timed_fn.__name__ = fn.__name__
+        timed_fn.__doc__ = fn.__doc__
+        return timed_fn
+    return wrap
+
+
+def header(spans, total):
+    """Server-Timing value, e.g. ``upstream;dur=182.4, render;dur=1.2, total;dur=185.0`` (milliseconds)."""
+    parts = [f'{name};dur={seconds * 1000:.1f}' for name, seconds in spans.items()]
+    parts.append(f'total;dur={total * 1000:.1f}')
+    return ', '.join(parts)
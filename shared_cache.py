@@ -0,0 +1,192 @@
+# TTLCache-compatible cache shared by every worker process on a host.
+#
+# Entries live in a local SQLite file in WAL mode: readers never block the
+# writer, and a worker restart finds the cache already warm. Refresh claims are
+# leases taken with an atomic compare-and-set (an upsert that only wins when no
+# live lease exists), so one worker refreshes an entry while the others keep
+# serving it. Deserialized values are memoized per process by entry version and
+# write time, so a hit only pays for one indexed SELECT.
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import jsonutil
+
+DEFAULT_SQLITE_PATH = os.path.join(tempfile.gettempdir(), 'agrocast-cache.sqlite3')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    ns TEXT NOT NULL,
+    key BLOB NOT NULL,
+    version INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    value BLOB NOT NULL,
+    PRIMARY KEY (ns, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS entries_stored_at ON entries (ns, stored_at);
+CREATE TABLE IF NOT EXISTS leases (
+    ns TEXT NOT NULL,
+    key BLOB NOT NULL,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (ns, key)
+) WITHOUT ROWID;
+"""
+
+# The size cap is enforced and dead leases removed every this many writes
+_PURGE_EVERY = 64
+
+
+class SQLiteCache:
+    """Same interface as cache.TTLCache, stored in a SQLite file at ``path``.
+
+    ``namespace`` separates caches sharing one file. Values must be JSON
+    serializable. The size cap is enforced every few writes and evicts the
+    oldest writes rather than the least recently read, so reads never write.
+    Hit/miss counters are per process.
+    """
+
+    def __init__(self, path, namespace, maxsize=256, ttl=600, stale_ttl=0, lease_ttl=30):
+        self.path = path
+        self.namespace = namespace
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.lease_ttl = lease_ttl
+        self._local = threading.local()
+        self._memo = OrderedDict()  # key -> (version, stored_at, value)
+        self._lock = threading.Lock()
+        self._owner = None
+        self._owner_pid = None
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def _conn(self):
+        # sqlite3 connections belong to one thread and must not cross a fork
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _lease_owner(self):
+        if self._owner_pid != os.getpid():
+            self._owner = f'{os.getpid()}-{uuid.uuid4().hex}'
+            self._owner_pid = os.getpid()
+        return self._owner
+
+    @staticmethod
+    def _key(key):
+        return jsonutil.dumps(list(key) if isinstance(key, tuple) else key)
+
+    def get(self, key):
+        """Return ``(value, state)`` where state is 'fresh', 'stale' or None."""
+        k = self._key(key)
+        with self._lock:
+            memo = self._memo.get(key)
+        # version restarts at 1 when a purged or cleared key is written again, so
+        # the memo only stands for the row it was read from if stored_at matches too
+        row = self._conn().execute(
+            'SELECT version, stored_at, CASE WHEN version = ? AND stored_at = ? THEN NULL ELSE value END '
+            'FROM entries WHERE ns = ? AND key = ?',
+            (memo[0] if memo else -1, memo[1] if memo else -1, self.namespace, k)).fetchone()
+        age = None if row is None else time.time() - row[1]
+        if age is None or age > self.ttl + self.stale_ttl:
+            self.misses += 1
+            return None, None
+        version, stored_at, blob = row
+        if blob is None:
+            value = memo[2]
+        else:
+            value = jsonutil.loads(blob)
+            with self._lock:
+                self._memo[key] = (version, stored_at, value)
+                self._memo.move_to_end(key)
+                while len(self._memo) > self.maxsize:
+                    self._memo.popitem(last=False)
+        if age <= self.ttl:
+            self.hits += 1
+            return value, 'fresh'
+        self.stale_hits += 1
+        return value, 'stale'
+
+    def set(self, key, value):
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            'INSERT INTO entries (ns, key, version, stored_at, value) VALUES (?, ?, 1, ?, ?) '
+            'ON CONFLICT (ns, key) DO UPDATE SET version = version + 1, stored_at = excluded.stored_at, value = excluded.value',
+            (self.namespace, self._key(key), now, jsonutil.dumps(value)))
+        with self._lock:
+            self._memo.pop(key, None)
+            self.stores += 1
+            purge = self.stores % _PURGE_EVERY == 0
+        if purge:
+            self._purge(conn, now)
+
+    def _purge(self, conn, now):
+        # Expired rows are kept (within the size cap) as last_good() fallbacks
+        conn.execute(
+            'DELETE FROM entries WHERE ns = ? AND key IN '
+            '(SELECT key FROM entries WHERE ns = ? ORDER BY stored_at DESC LIMIT -1 OFFSET ?)',
+            (self.namespace, self.namespace, self.maxsize))
+        conn.execute('DELETE FROM leases WHERE ns = ? AND expires_at < ?', (self.namespace, now))
+
+    def last_good(self, key):
+        """The stored value for ``key`` however old it is, or None."""
+        row = self._conn().execute(
+            'SELECT value FROM entries WHERE ns = ? AND key = ?', (self.namespace, self._key(key))).fetchone()
+        return None if row is None else jsonutil.loads(row[0])
+
+    def begin_refresh(self, key):
+        """Claim the refresh of ``key`` across all processes; False if a live lease exists.
+
+        The lease lapses after ``lease_ttl`` seconds so a crashed worker cannot hold it.
+        """
+        now = time.time()
+        cursor = self._conn().execute(
+            'INSERT INTO leases (ns, key, owner, expires_at) VALUES (?, ?, ?, ?) '
+            'ON CONFLICT (ns, key) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at '
+            'WHERE leases.expires_at < ?',
+            (self.namespace, self._key(key), self._lease_owner(), now + self.lease_ttl, now))
+        return cursor.rowcount == 1
+
+    def end_refresh(self, key):
+        self._conn().execute(
+            'DELETE FROM leases WHERE ns = ? AND key = ? AND owner = ?', (self.namespace, self._key(key), self._lease_owner()))
+
+    def expires_in(self, key):
+        """Seconds until ``key`` turns stale (negative once it has), or None if absent."""
+        row = self._conn().execute(
+            'SELECT stored_at FROM entries WHERE ns = ? AND key = ?', (self.namespace, self._key(key))).fetchone()
+        return None if row is None else row[0] + self.ttl - time.time()
+
+    def stats(self):
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            'entries': len(self),
+            'hits': self.hits,
+            'staleHits': self.stale_hits,
+            'misses': self.misses,
+            'hitRatio': round((self.hits + self.stale_hits) / lookups, 4) if lookups else None,
+        }
+
+    def clear(self):
+        conn = self._conn()
+        conn.execute('DELETE FROM entries WHERE ns = ?', (self.namespace,))
+        conn.execute('DELETE FROM leases WHERE ns = ?', (self.namespace,))
+        with self._lock:
+            self._memo.clear()
+
+    def __len__(self):
+        return self._conn().execute('SELECT COUNT(*) FROM entries WHERE ns = ?', (self.namespace,)).fetchone()[0]
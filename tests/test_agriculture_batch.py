@@ -0,0 +1,61 @@
+import itertools
+import random
+
+import agriculture
+from agriculture import CROP_RULES, build_agriculture_recommendation
+from agriculture_batch import build_agriculture_recommendations
+
+
+def rule_thresholds():
+    """{'t': {...}, 'h': {...}, 'r': {...}}: every value a rule table compares against."""
+    conditions = [c for rules in CROP_RULES.values() for c, _ in rules]
+    for table in (agriculture.ALERT_RULES, agriculture.IRRIGATION_RULES, agriculture.FERTILIZER_RULES, agriculture.POST_HARVEST_RULES):
+        conditions += [c for c, _ in table]
+    for table in (agriculture.SOWING_WINDOW_RULES, agriculture.PEST_DISEASE_RULES):
+        conditions += [c for _, c, _ in table]
+    found = { 't': set(), 'h': set(), 'r': { 0 } }
+    for clauses in conditions:
+        for clause in clauses:
+            found[clause[0]].update(clause[2:])
+    return found
+
+
+def around(values):
+    return sorted({ x for v in values for x in (v - 0.5, v, v + 0.5) })
+
+
+CROPS = list(CROP_RULES) + ['Quinoa', '']
+THRESHOLDS = rule_thresholds()
+
+
+def check(crops, t, h, r):
+    batch = build_agriculture_recommendations(crops, t, h, r)
+    assert len(batch) == len(crops)
+    for row, args in zip(batch, zip(crops, t, h, r)):
+        assert row == build_agriculture_recommendation(*args), args
+    return batch
+
+
+def test_batch_matches_scalar_on_threshold_grid():
+    # Every crop against every combination of the values around temperature and
+    # humidity thresholds, with rainfall cycling through its own thresholds
+    rainfalls = itertools.cycle(around(THRESHOLDS['r']))
+    rows = [(crop, t, h, next(rainfalls)) for crop in CROPS for t in around(THRESHOLDS['t']) for h in around(THRESHOLDS['h'])]
+    batch = check(*map(list, zip(*rows)))
+    # The all-matches tables were exercised with several matches per row
+    assert max(len(row['alerts']) for row in batch) >= 2
+    assert max(len(row['pestDiseaseRisks']) for row in batch) >= 2
+
+
+def test_batch_matches_scalar_on_random_rows():
+    rng = random.Random(20240601)
+    n = 5000
+    crops = [rng.choice(CROPS) for _ in range(n)]
+    t = [rng.choice([rng.uniform(-10, 50), rng.choice(around(THRESHOLDS['t']))]) for _ in range(n)]
+    h = [rng.choice([rng.uniform(0, 100), rng.choice(around(THRESHOLDS['h']))]) for _ in range(n)]
+    r = [rng.choice([0.0, rng.uniform(0, 40), rng.choice(around(THRESHOLDS['r']))]) for _ in range(n)]
+    check(crops, t, h, r)
+
+
+def test_empty_batch():
+    assert build_agriculture_recommendations([], [], [], []) == []
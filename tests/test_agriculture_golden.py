@@ -0,0 +1,69 @@
+import ast
+import itertools
+import math
+import os
+
+import pytest
+
+import legacy_agriculture
+from agriculture import CROP_RULES, build_agriculture_recommendation
+
+LEGACY_SOURCE = os.path.join(os.path.dirname(__file__), 'legacy_agriculture.py')
+
+
+def legacy_thresholds():
+    """{'t': {...}, 'h': {...}, 'r': {...}, 'crop': {...}}: every constant the if-chain compares each name against."""
+    with open(LEGACY_SOURCE, encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    found = {}
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Compare):
+            continue
+        operands = [node.left] + node.comparators
+        constants = [o.value for o in operands if isinstance(o, ast.Constant) and o.value is not None]
+        for o in operands:
+            if isinstance(o, ast.Name):
+                found.setdefault(o.id, set()).update(constants)
+    return found
+
+
+THRESHOLDS = legacy_thresholds()
+
+
+def around(values, low, high):
+    """Each threshold, a little either side of it, and the range ends."""
+    points = { low, high }
+    for v in values:
+        points.update((v - 0.5, v, v + 0.5))
+    return sorted(points)
+
+
+TEMPERATURES = around(THRESHOLDS['t'], -10, 50)
+HUMIDITIES = around(THRESHOLDS['h'], 0, 100)
+RAINFALLS = around(THRESHOLDS['r'] | { 0 }, 0, 200)
+CROPS = sorted(THRESHOLDS['crop']) + ['Quinoa', '', 'rice']
+
+
+def test_every_crop_in_the_if_chain_has_rules():
+    assert set(CROP_RULES) == THRESHOLDS['crop']
+
+
+@pytest.mark.parametrize('crop', CROPS)
+def test_matches_legacy_if_chain_on_threshold_grid(crop):
+    for t, h, r in itertools.product(TEMPERATURES, HUMIDITIES, RAINFALLS):
+        expected = legacy_agriculture.build_agriculture_recommendation(crop, t, h, r)
+        assert build_agriculture_recommendation(crop, t, h, r) == expected, (crop, t, h, r)
+
+
+@pytest.mark.parametrize('crop', ['Rice', 'Wheat', 'Quinoa'])
+@pytest.mark.parametrize('inputs', [
+    (None, 50, 0),
+    ('hot', 50, 0),
+    ('30', '80', '0'),
+    (30, 80, None),
+    (math.inf, 80, 0),
+    (-math.inf, 80, 0),
+    (math.nan, 50, 0),
+])
+def test_matches_legacy_if_chain_on_odd_inputs(crop, inputs):
+    assert build_agriculture_recommendation(crop, *inputs) == legacy_agriculture.build_agriculture_recommendation(crop, *inputs)
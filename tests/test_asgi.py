@@ -0,0 +1,209 @@
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+
+import app
+import asgi
+from shared_cache import SQLiteCache
+
+
+def call(method, path, **kwargs):
+    async def go():
+        async with httpx.AsyncClient(app=asgi.app, base_url='http://test') as client:
+            return await client.request(method, path, **kwargs)
+    return asyncio.run(go())
+
+
+BATCH = { 'crop': ['Rice', 'Wheat', 'Quinoa'], 'temperature': [30, 12, 20], 'humidity': [80, 50, 60], 'rainfall': [12, 0, 3] }
+
+
+def test_recommendations_batch_matches_flask():
+    response = call('POST', '/agriculture/recommendations:batch', json=BATCH)
+    expected = app.app.test_client().post('/agriculture/recommendations:batch', json=BATCH)
+    assert response.status_code == 200
+    assert response.json() == expected.get_json()
+
+
+def test_recommendations_batch_rejects_bad_bodies():
+    assert call('POST', '/agriculture/recommendations:batch', content=b'not json').status_code == 400
+    assert call('POST', '/agriculture/recommendations:batch', json={ 'crop': ['Rice'] }).status_code == 400
+
+
+def test_batch_routes_are_post_only():
+    assert call('GET', '/agriculture/recommendations:batch').status_code == 405
+    options = call('OPTIONS', '/agriculture/crop-recommendations:batch')
+    assert options.headers['allow'] == 'POST, OPTIONS'
+
+
+def test_crop_recommendations_batch_reports_each_city(monkeypatch):
+    forecast = { 'list': [{ 'dt': 1700000000 + i * 10800, 'main': { 'temp': 25.0, 'humidity': 70 }, 'rain': { '3h': 1.0 } } for i in range(40)] }
+
+    async def get_forecast(api_key, city):
+        if city == 'Nowhere':
+            return { 'ok': False, 'error': '404: city not found' }
+        if city == 'Slow':
+            await asyncio.sleep(5)
+        return { 'ok': True, 'data': forecast }
+
+    monkeypatch.setattr(asgi, 'get_forecast', get_forecast)
+    monkeypatch.setattr(asgi, '_api_key', lambda: 'key')
+    response = call('POST', '/agriculture/crop-recommendations:batch', json={ 'cities': ['Pune', 'Nowhere', 'Slow'], 'deadline': 0.2 })
+    body = response.json()
+    assert response.status_code == 200
+    assert body['complete'] is False
+    pune, nowhere, slow = body['results']
+    assert pune['city'] == 'Pune' and pune['recommendedCrops']
+    assert nowhere == { 'city': 'Nowhere', 'error': '404: city not found' }
+    assert slow == { 'city': 'Slow', 'error': app.DEADLINE_EXCEEDED }
+
+
+def test_sqlite_cache_calls_run_off_the_event_loop(tmp_path):
+    cache = SQLiteCache(str(tmp_path / 'cache.sqlite3'), 'weather', ttl=60)
+    threads = []
+    real_get = cache.get
+
+    def get(key):
+        threads.append(threading.current_thread())
+        return real_get(key)
+    cache.get = get
+
+    async def fetch():
+        return { 'ok': True, 'data': { 'dt': 1 } }
+
+    async def go():
+        loop_thread = threading.current_thread()
+        first = await asgi._cached_fetch(cache, ('weather', 'x'), fetch)
+        second = await asgi._cached_fetch(cache, ('weather', 'x'), fetch)
+        return loop_thread, first, second
+
+    loop_thread, first, second = asyncio.run(go())
+    assert first['data'] == second['data'] == { 'dt': 1 }
+    assert threads and loop_thread not in threads
+
+
+def test_cached_routes_send_the_flask_validators_and_304(monkeypatch):
+    weather = app.stamp_entry({ 'ok': True, 'data': { 'dt': 1700000000, 'name': 'Pune', 'main': { 'temp': 30 } } }, 600)
+
+    async def get_weather(api_key, city):
+        return weather
+
+    monkeypatch.setattr(asgi, 'get_weather', get_weather)
+    monkeypatch.setattr(asgi, '_api_key', lambda: 'key')
+    first = call('GET', '/api/weather', params={ 'city': 'Pune', 'fields': 'name' })
+    assert first.status_code == 200
+    assert first.json() == { 'ok': True, 'data': { 'name': 'Pune' } }
+    assert first.headers['etag'].startswith('W/"1700000000.')
+    assert first.headers['cache-control'].startswith('public, max-age=')
+
+    with app.app.test_request_context():
+        flask_response = app.cached_response([weather], (['name'], False), lambda: {})
+    assert first.headers['etag'] == flask_response.headers['ETag']
+
+    again = call('GET', '/api/weather', params={ 'city': 'Pune', 'fields': 'name' }, headers={ 'If-None-Match': first.headers['etag'] })
+    assert again.status_code == 304
+    assert again.content == b''
+    assert again.headers['etag'] == first.headers['etag']
+
+    other = call('GET', '/api/weather', params={ 'city': 'Pune' }, headers={ 'If-None-Match': first.headers['etag'] })
+    assert other.status_code == 200
+    assert other.headers['etag'] != first.headers['etag']
+
+
+def test_input_only_results_and_errors():
+    response = call('GET', '/agriculture/recommendation', params={ 'crop': 'Rice', 'temperature': 30, 'humidity': 80, 'rainfall': 12 })
+    assert response.status_code == 200
+    # No forecast was needed: validators come from the inputs, reusable for the weather TTL
+    assert response.headers['cache-control'] == f'public, max-age={app.weather_cache.ttl}'
+    assert call('GET', '/api/weather').headers.get('etag') is None
+
+
+def test_unexpected_client_error_releases_the_breaker_probe(monkeypatch):
+    import breaker
+    import upstream
+
+    b = breaker.CircuitBreaker('data/2.5/weather', open_seconds=0)
+    b._open(0.0)
+    monkeypatch.setitem(upstream._breakers, b.name, b)
+
+    class Client:
+        async def get(self, url, params=None):
+            raise ValueError('bad URL')
+    monkeypatch.setattr(asgi, '_get_client', lambda: Client())
+    with pytest.raises(ValueError):
+        asyncio.run(asgi._get(upstream.openweather_url('data/2.5/weather'), {}))
+    assert b.state == breaker.OPEN
+    assert b.allow()
+
+
+@pytest.fixture
+def observed(monkeypatch):
+    import breaker
+    import upstream
+
+    outcomes = []
+    monkeypatch.setitem(upstream._breakers, 'data/2.5/weather', breaker.CircuitBreaker('data/2.5/weather', min_calls=100))
+    monkeypatch.setattr(upstream, '_observer', lambda endpoint, outcome, seconds: outcomes.append((endpoint, outcome, seconds is None)))
+    monkeypatch.setattr(upstream, '_backoff', lambda attempt: 0)
+    return outcomes
+
+
+def fake_client(monkeypatch, *results):
+    calls = []
+
+    class Client:
+        async def get(self, url, params=None):
+            calls.append(url)
+            result = results[len(calls) - 1]
+            if isinstance(result, Exception):
+                raise result
+            return httpx.Response(result, json={})
+    monkeypatch.setattr(asgi, '_get_client', lambda: Client())
+    return calls
+
+
+def get_weather_url():
+    import upstream
+
+    return asyncio.run(asgi._get(upstream.openweather_url('data/2.5/weather'), {}))
+
+
+def test_get_retries_and_observes_like_upstream_get(monkeypatch, observed):
+    import upstream
+
+    monkeypatch.setattr(upstream, 'MAX_RETRIES', 3)
+    calls = fake_client(monkeypatch, httpx.ConnectError('refused'), httpx.RemoteProtocolError('dropped'), 503, 200)
+    assert get_weather_url().status_code == 200
+    assert len(calls) == 4
+    assert observed == [('data/2.5/weather', outcome, False) for outcome in ('error', 'error', 503, 200)]
+
+
+def test_get_returns_the_last_retryable_status(monkeypatch, observed):
+    import upstream
+
+    monkeypatch.setattr(upstream, 'MAX_RETRIES', 1)
+    calls = fake_client(monkeypatch, 429, 502)
+    assert get_weather_url().status_code == 502
+    assert len(calls) == 2
+    assert [outcome for _, outcome, _ in observed] == [429, 502]
+
+
+def test_get_does_not_retry_read_timeouts(monkeypatch, observed):
+    calls = fake_client(monkeypatch, httpx.ReadTimeout('slow'), 200)
+    with pytest.raises(httpx.ReadTimeout):
+        get_weather_url()
+    assert len(calls) == 1
+    assert observed == [('data/2.5/weather', 'timeout', False)]
+
+
+def test_get_observes_an_open_circuit(monkeypatch, observed):
+    import upstream
+
+    upstream._breakers['data/2.5/weather']._open(time.monotonic())
+    calls = fake_client(monkeypatch, 200)
+    with pytest.raises(upstream.CircuitOpenError):
+        get_weather_url()
+    assert calls == []
+    assert observed == [('data/2.5/weather', 'circuit_open', True)]
@@ -0,0 +1,108 @@
+import random
+
+import pytest
+
+from forecast_series import DEFAULT_HORIZON_HOURS, ForecastSeries, compact_forecast, parse_horizon
+
+DAY = 24 * 3600
+
+
+def payload(n, rng, gaps=True, tz=0):
+    """A forecast of n 3-hour slots. Values are multiples of 0.25, so sums are exact in any order."""
+    slots = []
+    for i in range(n):
+        main = { 'temp': rng.randint(-40, 180) / 4, 'humidity': rng.randint(0, 100) }
+        slot = { 'dt': 1700006400 + i * 10800, 'main': main }
+        if gaps and rng.random() < 0.15:
+            main['temp'] = None
+        if gaps and rng.random() < 0.1:
+            del main['humidity']
+        roll = rng.random()
+        if roll < 0.3:
+            slot['rain'] = { '3h': rng.randint(0, 40) / 4 }
+        elif roll < 0.4:
+            slot['rain'] = { '1h': rng.randint(0, 8) / 4 }
+        elif gaps and roll < 0.45:
+            slot['rain'] = { '3h': 'n/a' }
+        slots.append(slot)
+    return { 'city': { 'name': 'Pune', 'timezone': tz }, 'list': slots }
+
+
+def naive(data, start, end):
+    temps, hums, rains = [], [], []
+    for item in data['list'][start:end]:
+        main = item.get('main', {})
+        if isinstance(main.get('temp'), (int, float)):
+            temps.append(main['temp'])
+        if isinstance(main.get('humidity'), (int, float)):
+            hums.append(main['humidity'])
+        rain = item.get('rain', {})
+        r = rain.get('3h') or rain.get('1h') or 0.0
+        if isinstance(r, (int, float)):
+            rains.append(r)
+    one = lambda v: None if v is None else round(v, 1)
+    return {
+        'avgTemp': one(sum(temps) / len(temps)) if temps else None,
+        'avgHumidity': one(sum(hums) / len(hums)) if hums else None,
+        'avgRainfall': one(sum(rains)) if rains else None,
+        'minTemp': one(min(temps)) if temps else None,
+        'maxTemp': one(max(temps)) if temps else None,
+    }
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('gaps', [False, True])
+def test_every_window_matches_a_naive_loop(seed, gaps):
+    rng = random.Random(seed)
+    data = payload(40, rng, gaps)
+    series = ForecastSeries(data)
+    for start in range(41):
+        for end in range(start, 41):
+            assert series.window(start, end) == naive(data, start, end), (start, end)
+
+
+def test_window_clamps_out_of_range_bounds():
+    data = payload(8, random.Random(1), gaps=False)
+    series = ForecastSeries(data)
+    assert series.window(-5, 100) == naive(data, 0, 8)
+    assert series.window(6, 2) == naive(data, 6, 6) == { 'avgTemp': None, 'avgHumidity': None, 'avgRainfall': None, 'minTemp': None, 'maxTemp': None }
+
+
+def test_horizon_rounds_up_to_whole_slots():
+    data = payload(40, random.Random(2), gaps=False)
+    series = ForecastSeries(data)
+    assert series.horizon(24) == naive(data, 0, 8)
+    assert series.horizon(25) == naive(data, 0, 9)
+    assert series.horizon(1000) == naive(data, 0, 40)
+
+
+def test_daily_splits_on_local_dates():
+    # 1700006400 is 00:00 UTC; at UTC+5:30 the first local day runs 05:30 to 23:30, seven slots
+    data = payload(40, random.Random(3), gaps=True, tz=19800)
+    days = ForecastSeries(data).daily()
+    assert [d['date'] for d in days] == ['2023-11-15', '2023-11-16', '2023-11-17', '2023-11-18', '2023-11-19', '2023-11-20']
+    bounds = [0, 7, 15, 23, 31, 39, 40]
+    for day, start, end in zip(days, bounds, bounds[1:]):
+        assert { k: v for k, v in day.items() if k != 'date' } == naive(data, start, end)
+
+
+def test_parses_the_same_after_compaction():
+    data = payload(40, random.Random(4))
+    assert ForecastSeries(compact_forecast(data)).daily() == ForecastSeries(data).daily()
+
+
+def test_empty_and_missing_payloads():
+    for data in (None, {}, { 'list': None }, { 'list': [] }):
+        series = ForecastSeries(data)
+        assert len(series) == 0
+        assert series.horizon(72)['avgTemp'] is None
+        assert series.daily() == []
+
+
+@pytest.mark.parametrize('value,hours', [
+    (None, DEFAULT_HORIZON_HOURS), ('', DEFAULT_HORIZON_HOURS), (' ', DEFAULT_HORIZON_HOURS), ('\t', DEFAULT_HORIZON_HOURS),
+    ('24h', 24), ('48H', 48), (' 72h ', 72), ('5d', 120), ('2d', 48), ('12', 12), ('120h', 120),
+    ('0', None), ('121', None), ('6d', None), ('-3h', None), ('abc', None), ('h', None), ('1.5d', None),
+])
+def test_parse_horizon(value, hours):
+    assert parse_horizon(value) == hours
@@ -0,0 +1,59 @@
+import asyncio
+from unittest import mock
+
+import pytest
+
+import app
+from cache import TTLCache
+
+
+@pytest.fixture
+def geocode(monkeypatch):
+    monkeypatch.setattr(app, 'geocode_cache', TTLCache(16, 3600))
+    monkeypatch.setattr(app, 'geocode_failures', TTLCache(16, 60))
+    monkeypatch.setattr(app, 'GEOCODE_FAILURE_TTL', 60)
+    index = mock.Mock()
+    index.lookup.return_value = (None, False)
+    monkeypatch.setattr(app, 'get_city_index', lambda: index)
+    fake = mock.Mock(return_value={ 'ok': False })
+    monkeypatch.setattr(app, '_geocode', fake)
+    return fake
+
+
+def test_failed_geocode_is_not_retried_within_ttl(geocode):
+    for _ in range(5):
+        assert app.resolve_city('key', 'Atlantis') == (None, None)
+    assert geocode.call_count == 1
+
+
+def test_failed_geocode_is_retried_after_ttl(geocode, monkeypatch):
+    monkeypatch.setattr(app, 'geocode_failures', TTLCache(16, 0))
+    app.resolve_city('key', 'Atlantis')
+    geocode.return_value = { 'ok': True, 'data': { 'lat': 1.0, 'lon': 2.0, 'country': 'XX' } }
+    assert app.resolve_city('key', 'Atlantis') == ({ 'lat': 1.0, 'lon': 2.0, 'country': 'XX' }, None)
+    assert geocode.call_count == 2
+
+
+def test_disabled_failure_cache_retries_every_time(geocode, monkeypatch):
+    monkeypatch.setattr(app, 'GEOCODE_FAILURE_TTL', 0)
+    for _ in range(3):
+        app.resolve_city('key', 'Atlantis')
+    assert geocode.call_count == 3
+
+
+def test_asgi_failed_geocode_is_not_retried_within_ttl(geocode, monkeypatch):
+    import asgi
+
+    calls = []
+
+    async def fake(api_key, city):
+        calls.append(city)
+        return { 'ok': False }
+
+    monkeypatch.setattr(asgi, 'geocode_cache', app.geocode_cache)
+    monkeypatch.setattr(asgi, 'geocode_failures', app.geocode_failures)
+    monkeypatch.setattr(asgi, 'get_city_index', app.get_city_index)
+    monkeypatch.setattr(asgi, '_geocode', fake)
+    for _ in range(3):
+        assert asyncio.run(asgi.resolve_city('key', 'Atlantis')) == (None, None)
+    assert len(calls) == 1
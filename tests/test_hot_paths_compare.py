@@ -0,0 +1,27 @@
+import json
+import os
+import subprocess
+import sys
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'hot_paths.py')
+
+
+def compare(tmp_path, baseline, current):
+    for name, results in (('baseline.json', baseline), ('current.json', current)):
+        (tmp_path / name).write_text(json.dumps({ 'results': results }))
+    return subprocess.run([sys.executable, SCRIPT, 'compare', str(tmp_path / 'baseline.json'), str(tmp_path / 'current.json')],
+                          capture_output=True, text=True, timeout=60)
+
+
+def test_zero_or_missing_baseline_reports_na(tmp_path):
+    proc = compare(tmp_path, { 'zero': { 'us': 0 }, 'missing': {}, 'null': { 'us': None } },
+                   { 'zero': { 'us': 1.0 }, 'missing': { 'us': 1.0 }, 'null': { 'us': 1.0 } })
+    assert proc.returncode == 0, proc.stderr
+    lines = [line.split() for line in proc.stdout.splitlines()[1:-1]]
+    assert { line[0]: line[-1] for line in lines } == { 'missing': 'n/a', 'null': 'n/a', 'zero': 'n/a' }
+
+
+def test_regression_still_fails(tmp_path):
+    proc = compare(tmp_path, { 'slow': { 'us': 1.0 } }, { 'slow': { 'us': 2.0 } })
+    assert proc.returncode == 1
+    assert 'REGRESSION' in proc.stdout
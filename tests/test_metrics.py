@@ -0,0 +1,119 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import jsonutil
+import metrics
+
+
+@pytest.fixture
+def registry(tmp_path):
+    r = metrics.Registry(directory=str(tmp_path))
+    r.requests = r.counter('requests_total', 'Requests.', ('route',))
+    r.latency = r.histogram('latency_seconds', 'Latency.', buckets=(0.1, 1))
+    r.busy = r.gauge('busy', 'Busy.', lambda: { (): 1 })
+    return r
+
+
+@pytest.fixture
+def other_pid():
+    """A live pid that is not this process."""
+    proc = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)'])
+    yield proc.pid
+    proc.kill()
+    proc.wait()
+
+
+def dead_pid():
+    proc = subprocess.Popen([sys.executable, '-c', 'pass'])
+    proc.wait()
+    return proc.pid
+
+
+def write_snapshot(registry, pid, id, started, requests, busy=1):
+    snapshot = {
+        'pid': pid, 'id': id, 'started': started,
+        'metrics': {
+            'requests_total': { 'route="/api/weather"': requests },
+            'latency_seconds': { '': [requests, 0, 0, requests * 0.05] },
+            'busy': { '': busy },
+        },
+    }
+    with open(os.path.join(registry.directory, f'{pid}-{id}.json'), 'wb') as f:
+        f.write(jsonutil.dumps(snapshot))
+
+
+def values(text):
+    return dict(line.rsplit(' ', 1) for line in text.splitlines() if not line.startswith('#'))
+
+
+def test_exited_workers_are_folded_and_never_counted_twice(registry):
+    registry.requests.inc('/api/weather', amount=2)
+    write_snapshot(registry, dead_pid(), 'a' * 32, 1.0, 5)
+
+    for _ in range(2):
+        v = values(registry.render())
+        assert v['requests_total{route="/api/weather"}'] == '7'
+        assert v['latency_seconds_count'] == '5'
+        # Only this process is live
+        assert v['busy'] == '1'
+    assert sorted(os.listdir(registry.directory)) == ['.lock', metrics.RETIRED]
+
+
+def test_reused_pid_keeps_both_workers_totals(registry, other_pid):
+    write_snapshot(registry, other_pid, 'old', 1.0, 3, busy=1)
+    write_snapshot(registry, other_pid, 'new', 2.0, 4, busy=1)
+
+    v = values(registry.render())
+    assert v['requests_total{route="/api/weather"}'] == '7'
+    # The old snapshot's gauges died with it
+    assert v['busy'] == '2'
+    assert f'{other_pid}-old.json' not in os.listdir(registry.directory)
+    assert f'{other_pid}-new.json' in os.listdir(registry.directory)
+
+
+def test_a_dead_predecessor_of_this_pid_is_folded(registry):
+    write_snapshot(registry, os.getpid(), 'predecessor', 0.0, 6)
+    registry.flush()
+    v = values(registry.render())
+    assert v['requests_total{route="/api/weather"}'] == '6'
+    assert v['busy'] == '1'
+
+
+def test_interrupted_fold_is_not_repeated(registry):
+    pid = dead_pid()
+    write_snapshot(registry, pid, 'gone', 1.0, 5)
+    # As if a fold had written retired.json and died before removing the snapshot
+    retired = { 'metrics': { 'requests_total': { 'route="/api/weather"': 5 } }, 'folded': ['gone'] }
+    with open(os.path.join(registry.directory, metrics.RETIRED), 'wb') as f:
+        f.write(jsonutil.dumps(retired))
+
+    assert values(registry.render())['requests_total{route="/api/weather"}'] == '5'
+    assert f'{pid}-gone.json' not in os.listdir(registry.directory)
+
+
+def test_forked_processes_get_their_own_snapshot_file(registry):
+    registry.flush()
+    parent = os.path.basename(registry._path())
+    read, write = os.pipe()
+    child = os.fork()
+    if child == 0:
+        registry.flush()
+        os.write(write, os.path.basename(registry._path()).encode())
+        os._exit(0)
+    os.waitpid(child, 0)
+    child_file = os.read(read, 200).decode()
+    assert child_file != parent
+    assert { parent, child_file } <= set(os.listdir(registry.directory))
+
+
+def test_gauge_combine_picks_how_workers_merge(registry, other_pid):
+    registry.gauge('state', 'State.', lambda: { ('weather',): 1 }, ('endpoint',), combine=max)
+    snapshot = { 'pid': other_pid, 'id': 'b' * 32, 'started': 1.0, 'metrics': { 'state': { 'endpoint="weather"': 2 }, 'busy': { '': 1 } } }
+    with open(os.path.join(registry.directory, f'{other_pid}-{"b" * 32}.json'), 'wb') as f:
+        f.write(jsonutil.dumps(snapshot))
+    v = values(registry.render())
+    assert v['state{endpoint="weather"}'] == '2'
+    assert v['busy'] == '2'
@@ -0,0 +1,44 @@
+import os
+import re
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FUNCTIONS = os.path.join(ROOT, 'netlify', 'functions')
+HEADER = re.compile(r'# Copy of the top-level (\S+); Netlify bundles only this directory, so keep the two in sync\.\n\n')
+
+
+def copies():
+    """(copy path, source path, copied text) for every netlify/functions module marked as a copy."""
+    found = []
+    for name in sorted(os.listdir(FUNCTIONS)):
+        if not name.endswith('.py'):
+            continue
+        with open(os.path.join(FUNCTIONS, name), encoding='utf-8') as f:
+            text = f.read()
+        match = HEADER.search(text)
+        if match:
+            found.append((name, match.group(1), text[match.end():]))
+    return found
+
+
+COPIES = copies()
+
+
+def test_every_shadowing_module_is_a_marked_copy():
+    marked = { name for name, _, _ in COPIES }
+    shadowing = { name for name in os.listdir(FUNCTIONS) if name.endswith('.py') and os.path.exists(os.path.join(ROOT, name)) }
+    assert shadowing <= marked
+    assert 'agriculture_logic.py' in marked
+
+
+@pytest.mark.parametrize('name,source,text', COPIES, ids=[c[0] for c in COPIES])
+def test_copy_matches_source(name, source, text):
+    with open(os.path.join(ROOT, source), encoding='utf-8') as f:
+        expected = f.read()
+    assert text == expected, f'netlify/functions/{name} differs from {source}; re-copy it below the header'
+
+
+def test_crop_catalog_matches():
+    with open(os.path.join(ROOT, 'data', 'crops.csv'), 'rb') as a, open(os.path.join(FUNCTIONS, 'data', 'crops.csv'), 'rb') as b:
+        assert a.read() == b.read()
@@ -0,0 +1,30 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+FUNCTIONS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'netlify', 'functions')
+
+
+def run_in_functions(code):
+    """Run ``code`` in a fresh interpreter rooted at netlify/functions, whose modules shadow the top-level ones."""
+    env = dict(os.environ, OPENWEATHER_API_KEY='test')
+    env.pop('PYTHONPATH', None)
+    proc = subprocess.run([sys.executable, '-c', textwrap.dedent(code)], cwd=FUNCTIONS, env=env,
+                          capture_output=True, text=True, timeout=60)
+    assert proc.returncode == 0, proc.stderr
+    return proc.stdout
+
+
+def test_open_breaker_returns_unavailable_not_500():
+    out = run_in_functions("""
+        from unittest import mock
+        import core, upstream
+        with mock.patch.object(upstream, 'get', side_effect=upstream.CircuitOpenError('data/2.5/weather')):
+            for handler in (core.weather, core.forecast, core.dashboard, core.crop_recommendations):
+                payload, status = handler({ 'city': 'Pune' })
+                print(status, payload['error'])
+    """)
+    lines = out.strip().splitlines()
+    assert len(lines) == 4
+    assert all(line == f'503 {"Weather service is temporarily unavailable. Please try again shortly."}' for line in lines)
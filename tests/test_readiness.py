@@ -0,0 +1,48 @@
+from unittest import mock
+
+import app
+
+
+def test_sync_workers_never_report_saturation():
+    with mock.patch.object(app, 'READY_MAX_IN_FLIGHT', 0):
+        payload, status = app.readiness(100)
+    assert status == 200
+    assert payload['ready']
+
+
+def test_all_threads_busy_is_not_ready():
+    # WEB_THREADS=4: the probe holds one thread, three others are busy
+    with mock.patch.object(app, 'READY_MAX_IN_FLIGHT', 3):
+        assert app.readiness(2)[1] == 200
+        payload, status = app.readiness(3)
+    assert status == 503
+    assert payload['reasons'] == ['all 4 worker threads busy']
+
+
+def test_probe_never_queries_the_sqlite_cache(tmp_path, monkeypatch):
+    from shared_cache import SQLiteCache
+
+    weather = SQLiteCache(str(tmp_path / 'cache.sqlite3'), 'weather')
+    forecast = SQLiteCache(str(tmp_path / 'cache.sqlite3'), 'forecast')
+    weather.set(('Pune',), { 'ok': True })
+    assert weather.get(('Pune',))[1] == 'fresh'
+
+    def no_queries():
+        raise AssertionError('readiness queried SQLite')
+    monkeypatch.setattr(weather, '_conn', no_queries)
+    monkeypatch.setattr(forecast, '_conn', no_queries)
+    monkeypatch.setattr(app, 'weather_cache', weather)
+    monkeypatch.setattr(app, 'forecast_cache', forecast)
+    payload, status = app.readiness(0)
+    assert status == 200
+    assert payload['cache'] == { 'weather': { 'warm': True, 'hitRatio': 1.0 }, 'forecast': { 'warm': False, 'hitRatio': None } }
+
+
+def test_open_breaker_with_nothing_cached_is_not_ready(monkeypatch):
+    from cache import TTLCache
+
+    monkeypatch.setattr(app, 'weather_cache', TTLCache(4, 60))
+    monkeypatch.setattr(app.upstream, 'breaker_rejecting', lambda name: True)
+    assert app.readiness(0)[1] == 503
+    app.weather_cache.set(('Pune',), { 'ok': True })
+    assert app.readiness(0)[1] == 200
@@ -0,0 +1,77 @@
+import time
+
+import pytest
+
+import shared_cache
+from shared_cache import SQLiteCache
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'cache.sqlite3')
+
+
+def pair(path, **kwargs):
+    """Two caches on one file, standing in for two gunicorn workers."""
+    return SQLiteCache(path, 'weather', **kwargs), SQLiteCache(path, 'weather', **kwargs)
+
+
+def test_write_from_another_instance_replaces_the_memo(path):
+    a, b = pair(path)
+    b.set(('Pune',), { 'temp': 'OLD' })
+    assert a.get(('Pune',)) == ({ 'temp': 'OLD' }, 'fresh')
+    b.set(('Pune',), { 'temp': 'NEW' })
+    assert a.get(('Pune',)) == ({ 'temp': 'NEW' }, 'fresh')
+
+
+def test_rewrite_after_clear_is_not_served_from_the_memo(path):
+    a, b = pair(path)
+    b.set(('Pune',), { 'temp': 'OLD' })
+    assert a.get(('Pune',))[0] == { 'temp': 'OLD' }
+    b.clear()
+    time.sleep(0.01)
+    # The new row starts again at version 1, the version a has memoized
+    b.set(('Pune',), { 'temp': 'NEW' })
+    assert a.get(('Pune',)) == ({ 'temp': 'NEW' }, 'fresh')
+
+
+def test_rewrite_after_purge_is_not_served_from_the_memo(path, monkeypatch):
+    monkeypatch.setattr(shared_cache, '_PURGE_EVERY', 1)
+    a, b = pair(path, maxsize=1)
+    b.set(('Pune',), { 'temp': 'OLD' })
+    assert a.get(('Pune',))[0] == { 'temp': 'OLD' }
+    time.sleep(0.01)
+    # Over the cap: Pune is the oldest row and is purged
+    b.set(('Delhi',), { 'temp': 'D' })
+    assert a.get(('Pune',)) == (None, None)
+    time.sleep(0.01)
+    b.set(('Pune',), { 'temp': 'NEW' })
+    assert a.get(('Pune',)) == ({ 'temp': 'NEW' }, 'fresh')
+
+
+def test_begin_refresh_is_won_by_one_instance(path):
+    a, b = pair(path)
+    assert a.begin_refresh(('Pune',))
+    assert not b.begin_refresh(('Pune',))
+    assert not a.begin_refresh(('Pune',))
+    a.end_refresh(('Pune',))
+    assert b.begin_refresh(('Pune',))
+
+
+def test_end_refresh_only_releases_own_lease(path, monkeypatch):
+    a = SQLiteCache(path, 'weather')
+    b = SQLiteCache(path, 'weather')
+    # Lease owners are per process; give b its own, as another worker would have
+    monkeypatch.setattr(b, '_lease_owner', lambda: 'other-worker')
+    assert a.begin_refresh(('Pune',))
+    b.end_refresh(('Pune',))
+    assert not b.begin_refresh(('Pune',))
+
+
+def test_expired_lease_can_be_taken_over(path):
+    a, b = pair(path, lease_ttl=0.05)
+    assert a.begin_refresh(('Pune',))
+    assert not b.begin_refresh(('Pune',))
+    time.sleep(0.1)
+    # The holder crashed without end_refresh; the lease lapses
+    assert b.begin_refresh(('Pune',))
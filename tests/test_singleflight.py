@@ -0,0 +1,101 @@
+import threading
+import time
+
+import pytest
+
+from cache import SingleFlight
+
+THREADS = 16
+
+
+def run_callers(flight, fn, n=THREADS):
+    """Call flight.do('pune', fn) from n threads; fn is only released once all n have called in.
+
+    Returns (results, errors), one entry per thread that returned or raised.
+    """
+    arrived = threading.Semaphore(0)
+    results, errors = [], []
+
+    def caller():
+        arrived.release()
+        try:
+            results.append(flight.do('pune', fn, timeout=5))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=caller) for _ in range(n)]
+    for t in threads:
+        t.start()
+    for _ in range(n):
+        arrived.acquire()
+    return threads, results, errors
+
+
+def gated(fn):
+    """Wrap fn so it blocks until gate is set, giving late callers time to join."""
+    gate = threading.Event()
+    calls = []
+
+    def wrapped():
+        calls.append(1)
+        gate.wait(5)
+        return fn()
+    return wrapped, gate, calls
+
+
+def finish(threads, gate):
+    # Callers signal just before do(); give the last ones a moment to start waiting
+    time.sleep(0.1)
+    gate.set()
+    for t in threads:
+        t.join(5)
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    fn, gate, calls = gated(lambda: { 'value': 42 })
+    threads, results, errors = run_callers(flight, fn)
+    finish(threads, gate)
+
+    assert not errors
+    assert len(calls) == 1
+    assert len(results) == THREADS
+    assert all(r is results[0] for r in results)
+    assert results[0] == { 'value': 42 }
+    assert flight.in_flight() == 0
+
+
+def test_follower_times_out():
+    flight = SingleFlight()
+    fn, gate, calls = gated(lambda: 'late')
+    threads, _, _ = run_callers(flight, fn, n=1)
+    while flight.in_flight() == 0:
+        time.sleep(0.001)
+    try:
+        started = time.monotonic()
+        with pytest.raises(TimeoutError):
+            flight.do('pune', lambda: 'never called', timeout=0.05)
+        assert time.monotonic() - started < 1
+    finally:
+        finish(threads, gate)
+    assert len(calls) == 1
+    assert flight.in_flight() == 0
+
+
+def test_leader_error_reaches_every_waiter_and_releases_key():
+    flight = SingleFlight()
+
+    def explode():
+        raise ValueError('upstream exploded')
+
+    fn, gate, calls = gated(explode)
+    threads, results, errors = run_callers(flight, fn)
+    finish(threads, gate)
+
+    assert len(calls) == 1
+    assert not results
+    assert len(errors) == THREADS
+    assert all(isinstance(e, ValueError) and str(e) == 'upstream exploded' for e in errors)
+    # The key is free again: the next call runs its own fn
+    assert flight.in_flight() == 0
+    assert flight.do('pune', lambda: 'recovered') == 'recovered'
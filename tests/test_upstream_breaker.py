@@ -0,0 +1,41 @@
+from unittest import mock
+
+import pytest
+
+import breaker
+import upstream
+
+URL = upstream.openweather_url('data/2.5/weather')
+
+
+@pytest.fixture
+def half_open(monkeypatch):
+    b = breaker.CircuitBreaker('data/2.5/weather', open_seconds=0)
+    b._open(0.0)
+    monkeypatch.setitem(upstream._breakers, b.name, b)
+    return b
+
+
+def test_non_requests_error_releases_the_probe(half_open):
+    with mock.patch.object(upstream.get_session(), 'get', side_effect=ValueError('bad URL')):
+        with pytest.raises(ValueError):
+            upstream.get(URL)
+    # The failed probe reopened the breaker; after open_seconds (0 here) the next call may probe again
+    assert half_open.state == breaker.OPEN
+    response = mock.Mock(status_code=200)
+    with mock.patch.object(upstream.get_session(), 'get', return_value=response):
+        assert upstream.get(URL) is response
+    assert half_open.state == breaker.CLOSED
+
+
+def test_breaker_state_gauge(half_open, monkeypatch):
+    import app
+
+    gauge = next(m for m in app.metrics.registry.metrics if m.name == 'agrocast_upstream_breaker_state')
+    closed = breaker.CircuitBreaker('geo/1.0/direct')
+    monkeypatch.setattr(upstream, '_breakers', { half_open.name: half_open, closed.name: closed })
+    half_open.open_seconds = 60
+    assert gauge.snapshot() == { 'endpoint="data/2.5/weather"': 2, 'endpoint="geo/1.0/direct"': 0 }
+    half_open.open_seconds = 0
+    half_open.allow()
+    assert gauge.snapshot()['endpoint="data/2.5/weather"'] == 1